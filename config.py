@@ -36,6 +36,10 @@ DEFAULT_EXCLUDED_FOLDERS = [
     "virtualenv"
 ]
 
+# Patrones glob de exclusión: sin '/' se comparan con el nombre del archivo o
+# carpeta (p. ej. "*.min.js"); con '/' con la ruta relativa (p. ej. "tests/fixtures/**")
+DEFAULT_EXCLUDED_PATTERNS = []
+
 DEFAULT_ALLOWED_EXTENSIONS = [
     ".py",
     ".js", 
@@ -109,6 +113,35 @@ DEFAULT_LOG_FILENAME = "errores_extraccion.log"
 # Configuraciones de procesamiento
 MAX_FILE_SIZE_MB = 10  # Tamaño máximo de archivo individual en MB
 ENCODING_DETECTION_BYTES = 8192  # Bytes a leer para detectar codificación
+DEFAULT_SKIP_BINARY = True  # Omitir archivos cuyo contenido parece binario aunque su extensión esté permitida
+BINARY_CONTROL_RATIO = 0.3  # Proporción de caracteres de control a partir de la cual una muestra es binaria
+STREAMING_THRESHOLD_MB = 1  # Archivos más grandes se copian por bloques en lugar de leerse enteros
+STREAM_CHUNK_SIZE = 1024 * 1024  # Caracteres por bloque en la copia por streaming
+DEFAULT_JOBS = 1  # Hilos de lectura/decodificación en paralelo (1 = secuencial)
+DEFAULT_DETECT_PROCESSES = 0  # Procesos para detectar codificación (0 = en el propio proceso)
+DETECTION_BATCH_SIZE = 64  # Máximo de muestras enviadas juntas a cada proceso de detección
+DEFAULT_BINARY_OUTPUT = False  # Copiar tal cual los archivos UTF-8 (sin convertir saltos de línea)
+DEFAULT_USE_CACHE = False  # Reutilizar entre ejecuciones las codificaciones ya detectadas
+CACHE_FILENAME = "encoding_cache.sqlite3"  # Se guarda en CONFIG_DIR
+CACHE_MAX_ENTRIES = 200000  # Entradas de la caché antes de expulsar las menos usadas
+DEFAULT_OUTPUT_FORMAT = "text"  # "text", "gzip", "xz" o "bz2"
+DEFAULT_COMPRESSION_LEVEL = 6  # Nivel de compresión (1-9) para los formatos comprimidos
+DEFAULT_THREADED_COMPRESSION = False  # Comprimir en un hilo aparte
+BYTES_PER_TOKEN = 4  # Estimación rápida de tokens para el presupuesto de salida
+DEFAULT_BUDGET_POLICY = "order"  # "order", "smallest" o "extension"
+DEFAULT_EXTENSION_PRIORITY = [".py", ".md"]  # Para la política "extension", de mayor a menor prioridad
+DEFAULT_DEDUPLICATE = False  # Escribir una sola vez el contenido de archivos idénticos
+DEFAULT_SHARD_WORKERS = 4  # Partes de la salida que se escriben a la vez
+DEFAULT_RESPECT_GITIGNORE = False  # Omitir lo ignorado por .gitignore y .git/info/exclude
+DEFAULT_SOURCE_MODE = "walk"  # "walk" (recorrer el disco) o "git" (archivos del índice de git)
+PROGRESS_MAX_RATE_HZ = 20  # Máximo de actualizaciones de progreso por segundo
+DEFAULT_ENGINE = "threads"  # "threads" (hilos con ventana) o "asyncio" (etapas unidas por colas acotadas)
+DEFAULT_MAX_INFLIGHT_MB = 64  # Motor asyncio: MB leídos y aún no escritos como máximo
+PIPELINE_MAX_ITEMS = 256  # Motor asyncio: archivos en vuelo como máximo
+PIPELINE_QUEUE_SIZE = 32  # Motor asyncio: capacidad de cada cola entre etapas
+DEFAULT_BATCH_WORKERS = min(32, (os.cpu_count() or 1) + 4)  # extract_batch: hilos del pool compartido
+DEFAULT_BATCH_PARALLEL_ROOTS = 8  # extract_batch: carpetas en curso a la vez
+CANCEL_POLL_INTERVAL = 0.01  # Segundos entre comprobaciones de cancelación al esperar a otro proceso
 
 # Configuraciones de la aplicación
 APP_VERSION = "2.0.0"
@@ -120,7 +153,4 @@ PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSETS_DIR = os.path.join(PROJECT_DIR, "assets")
 CONFIG_DIR = os.path.join(PROJECT_DIR, "config")
 LOGS_DIR = os.path.join(PROJECT_DIR, "logs")
-
-# Crear directorios si no existen
-for directory in [ASSETS_DIR, CONFIG_DIR, LOGS_DIR]:
-    os.makedirs(directory, exist_ok=True)
+# Las carpetas se crean la primera vez que se escribe en ellas, no al importar
@@ -3,6 +3,13 @@ Módulo core del Extractor de Código.
 Contiene la lógica principal de procesamiento de archivos.
 """
 
-from .file_extractor import FileExtractor
-
 __all__ = ['FileExtractor']
+
+
+def __getattr__(name):
+    # FileExtractor se importa al pedirlo: los submódulos (p. ej. core.encoding
+    # en los procesos de detección) no cargan todo el extractor
+    if name == 'FileExtractor':
+        from .file_extractor import FileExtractor
+        return FileExtractor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
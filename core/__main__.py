@@ -0,0 +1,7 @@
+"""Permite ejecutar el extractor sin interfaz gráfica: python -m core CARPETA -o SALIDA"""
+
+import sys
+
+from core.cli import main
+
+sys.exit(main())
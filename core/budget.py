@@ -0,0 +1,86 @@
+"""
+Presupuesto de tamaño de la salida.
+
+Permite limitar la salida a un número de bytes o de tokens estimados. Los
+archivos se eligen antes de leer ningún contenido, con los tamaños del
+escaneo, según una política de selección.
+"""
+
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from core.scanner import FileEntry
+
+BUDGET_POLICIES = ('order', 'smallest', 'extension')
+
+
+def estimate_tokens(num_bytes: int, bytes_per_token: int) -> int:
+    """Estimación rápida de tokens a partir de un tamaño en bytes."""
+    return -(-num_bytes // bytes_per_token)
+
+
+def budget_to_bytes(budget_bytes: Optional[int], budget_tokens: Optional[int],
+                    bytes_per_token: int) -> Optional[int]:
+    """
+    Convierte el presupuesto pedido a bytes de salida.
+
+    Args:
+        budget_bytes: Máximo de bytes (o None)
+        budget_tokens: Máximo de tokens estimados (o None)
+        bytes_per_token: Bytes por token del estimador
+
+    Returns:
+        El límite más estricto en bytes, o None si no hay presupuesto
+    """
+    limits = []
+    if budget_bytes is not None:
+        limits.append(budget_bytes)
+    if budget_tokens is not None:
+        limits.append(budget_tokens * bytes_per_token)
+    if not limits:
+        return None
+    if min(limits) < 0:
+        raise ValueError("El presupuesto no puede ser negativo")
+    return min(limits)
+
+
+def select_within_budget(entries: Sequence[FileEntry], available: int, policy: str,
+                         extension_priority: Sequence[str],
+                         section_cost: Callable[[FileEntry], int]) -> Tuple[List[FileEntry], List[FileEntry]]:
+    """
+    Elige qué archivos caben en el presupuesto.
+
+    Los candidatos se recorren en el orden de la política y se incluye cada
+    uno que todavía quepa, aunque alguno anterior no cupiera.
+
+    Args:
+        entries: Archivos permitidos, en el orden de la salida
+        available: Bytes disponibles para las secciones de archivos
+        policy: 'order' (orden de la salida), 'smallest' (primero los más
+            pequeños) o 'extension' (según extension_priority)
+        extension_priority: Extensiones de mayor a menor prioridad; las que no
+            aparecen van al final
+        section_cost: Tamaño estimado de la sección de un archivo
+
+    Returns:
+        Tupla (archivos elegidos, archivos omitidos), ambos en el orden de entries
+    """
+    if policy not in BUDGET_POLICIES:
+        raise ValueError(f"Política de presupuesto no soportada: {policy}")
+
+    candidates = list(entries)
+    if policy == 'smallest':
+        candidates.sort(key=lambda entry: entry.size)
+    elif policy == 'extension':
+        rank = {ext.lower(): i for i, ext in enumerate(extension_priority)}
+        candidates.sort(key=lambda entry: rank.get(entry.extension, len(rank)))
+
+    chosen = set()
+    for entry in candidates:
+        cost = section_cost(entry)
+        if cost <= available:
+            available -= cost
+            chosen.add(entry.path)
+
+    selected = [entry for entry in entries if entry.path in chosen]
+    omitted = [entry for entry in entries if entry.path not in chosen]
+    return selected, omitted
@@ -0,0 +1,134 @@
+"""
+Caché persistente de codificaciones y metadatos de archivos.
+
+Guarda, para cada archivo ya procesado, la codificación detectada, un hash del
+contenido y si es binario. Las entradas se indexan por ruta absoluta, para
+que dos carpetas extraídas con rutas relativas no compartan claves, y solo son
+válidas mientras el archivo conserve el mismo inodo, tamaño y fecha de
+modificación.
+"""
+
+import os
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from core.scanner import FileEntry
+
+# SQLite limita el número de parámetros por consulta
+_QUERY_CHUNK = 500
+
+
+class CacheRecord(NamedTuple):
+    """Datos guardados en caché para un archivo."""
+    encoding: str
+    tier: str
+    digest: Optional[str]
+    is_binary: Optional[bool]
+
+
+class EncodingCache:
+    """Caché SQLite con expulsión LRU por número de entradas."""
+
+    def __init__(self, db_path: str, max_entries: int):
+        # sqlite3 solo se carga si se usa la caché
+        import sqlite3
+
+        self.max_entries = max_entries
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                inode INTEGER,
+                size INTEGER,
+                mtime_ns INTEGER,
+                encoding TEXT NOT NULL,
+                tier TEXT NOT NULL,
+                digest TEXT,
+                is_binary INTEGER,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_last_used ON files (last_used)")
+        self._conn.commit()
+
+    def lookup_many(self, entries: Iterable[FileEntry]) -> Dict[str, CacheRecord]:
+        """
+        Busca en la caché los archivos del manifiesto que no han cambiado.
+
+        Args:
+            entries: Archivos del manifiesto
+
+        Returns:
+            Diccionario ruta (entry.path) -> CacheRecord, solo con las
+            entradas vigentes
+        """
+        wanted = {os.path.abspath(entry.path): entry for entry in entries}
+        paths = list(wanted)
+        hits = {}
+        hit_paths = []
+        for i in range(0, len(paths), _QUERY_CHUNK):
+            chunk = paths[i:i + _QUERY_CHUNK]
+            rows = self._conn.execute(
+                "SELECT path, inode, size, mtime_ns, encoding, tier, digest, is_binary "
+                f"FROM files WHERE path IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for path, inode, size, mtime_ns, encoding, tier, digest, is_binary in rows:
+                entry = wanted[path]
+                if (inode, size, mtime_ns) == (entry.inode, entry.size, entry.mtime_ns):
+                    hits[entry.path] = CacheRecord(encoding, tier, digest,
+                                                   None if is_binary is None else bool(is_binary))
+                    hit_paths.append(path)
+
+        self._touch(hit_paths)
+        return hits
+
+    def store_many(self, items: List[tuple]):
+        """
+        Guarda o actualiza entradas y aplica la expulsión LRU.
+
+        Args:
+            items: Tuplas (FileEntry, CacheRecord)
+        """
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO files "
+            "(path, inode, size, mtime_ns, encoding, tier, digest, is_binary, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (os.path.abspath(entry.path), entry.inode, entry.size, entry.mtime_ns,
+                 record.encoding, record.tier, record.digest,
+                 None if record.is_binary is None else int(record.is_binary), now)
+                for entry, record in items
+            ],
+        )
+        self._evict()
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def _touch(self, paths: List[str]):
+        """Marca entradas como usadas recientemente."""
+        now = time.time()
+        for i in range(0, len(paths), _QUERY_CHUNK):
+            chunk = paths[i:i + _QUERY_CHUNK]
+            self._conn.execute(
+                f"UPDATE files SET last_used = ? WHERE path IN ({','.join('?' * len(chunk))})",
+                [now] + chunk,
+            )
+        self._conn.commit()
+
+    def _evict(self):
+        """Elimina las entradas menos usadas si se supera max_entries."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM files WHERE path IN "
+                "(SELECT path FROM files ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
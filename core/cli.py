@@ -0,0 +1,179 @@
+"""
+Interfaz de línea de comandos del extractor.
+
+Pensada para cron y CI: no importa ningún módulo de interfaz gráfica, escribe
+en stdout las estadísticas en JSON y termina con un código distinto de cero si
+hubo errores.
+
+Uso:
+    python -m core CARPETA [-o SALIDA] [opciones]
+
+Códigos de salida:
+    0  Extracción completa sin errores
+    1  La extracción terminó, pero algunos archivos fallaron
+    2  Argumentos no válidos o error crítico (no se generó la salida)
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import List, Optional
+
+from config import DEFAULT_OUTPUT_FILENAME
+from core.budget import BUDGET_POLICIES
+from core.file_extractor import FileExtractor
+from core.output import OUTPUT_FORMATS
+from core.pool import ENGINES
+from core.scanner import SOURCE_MODES
+
+EXIT_OK = 0
+EXIT_FILE_ERRORS = 1
+EXIT_FATAL = 2
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Crea el parser de argumentos."""
+    parser = argparse.ArgumentParser(
+        prog='python -m core',
+        description="Extrae y consolida el código de una carpeta en un único archivo.",
+    )
+    parser.add_argument('source', help="Carpeta de origen")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT_FILENAME,
+                        help=f"Archivo de salida (por defecto {DEFAULT_OUTPUT_FILENAME})")
+    parser.add_argument('--log', help="Archivo donde añadir los errores de cada archivo")
+
+    perf = parser.add_argument_group("rendimiento")
+    perf.add_argument('-j', '--jobs', type=int, help="Hilos de lectura en paralelo")
+    perf.add_argument('--detect-processes', type=int,
+                      help="Procesos para detectar la codificación (0 = en el propio proceso)")
+    perf.add_argument('--engine', choices=ENGINES,
+                      help="'threads' (pool de hilos) o 'asyncio' (etapas con colas acotadas)")
+    perf.add_argument('--max-inflight-mb', type=float,
+                      help="Motor asyncio: MB leídos y aún no escritos como máximo")
+    perf.add_argument('--cache', action='store_true',
+                      help="Reutilizar las codificaciones detectadas en ejecuciones anteriores")
+    perf.add_argument('--incremental', action='store_true',
+                      help="Copiar de la salida anterior las secciones de archivos sin cambios")
+
+    filters = parser.add_argument_group("filtros")
+    filters.add_argument('--extensions',
+                         help="Extensiones permitidas separadas por comas (sustituye a las de config.py)")
+    filters.add_argument('--add-extension', action='append', default=[], metavar='EXT',
+                         help="Añade una extensión permitida (repetible)")
+    filters.add_argument('--exclude', action='append', default=[], metavar='PATRÓN',
+                         help="Patrón glob a excluir, p. ej. '*.min.js' o 'tests/fixtures/**' (repetible)")
+    filters.add_argument('--exclude-folder', action='append', default=[], metavar='NOMBRE',
+                         help="Carpeta a excluir por nombre (repetible)")
+    filters.add_argument('--exclude-file', action='append', default=[], metavar='NOMBRE',
+                         help="Archivo a excluir por nombre (repetible)")
+    filters.add_argument('--max-file-size-mb', type=float,
+                         help="Tamaño máximo de cada archivo en MB")
+    filters.add_argument('--gitignore', action='store_true',
+                         help="Omitir lo ignorado por los .gitignore")
+    filters.add_argument('--source-mode', choices=SOURCE_MODES,
+                         help="'walk' recorre el disco; 'git' usa los archivos del índice de git")
+    filters.add_argument('--include-binary', action='store_true',
+                         help="No omitir los archivos cuyo contenido parece binario")
+
+    out = parser.add_argument_group("salida")
+    out.add_argument('--format', choices=OUTPUT_FORMATS, help="Formato de la salida")
+    out.add_argument('--compression-level', type=int, choices=range(1, 10), metavar='1-9',
+                     help="Nivel de compresión")
+    out.add_argument('--threaded-compression', action='store_true',
+                     help="Comprimir en un hilo aparte")
+    out.add_argument('--binary-output', action='store_true',
+                     help="Copiar tal cual los archivos UTF-8 (sin convertir saltos de línea)")
+    out.add_argument('--index', action='store_true',
+                     help="Escribir un índice de secciones (<salida>.idx)")
+    out.add_argument('--dedup', action='store_true',
+                     help="Escribir una sola vez el contenido de archivos idénticos")
+    out.add_argument('--budget-bytes', type=int, help="Tamaño máximo de la salida en bytes")
+    out.add_argument('--budget-tokens', type=int, help="Tamaño máximo de la salida en tokens estimados")
+    out.add_argument('--budget-policy', choices=BUDGET_POLICIES,
+                     help="Cómo elegir los archivos que caben en el presupuesto")
+    out.add_argument('--shard-size', type=int,
+                     help="Dividir la salida en partes de como mucho este tamaño en bytes")
+    return parser
+
+
+def configure_extractor(extractor: FileExtractor, args: argparse.Namespace):
+    """Aplica al extractor las opciones de filtrado de la línea de comandos."""
+    if args.extensions is not None:
+        extractor.allowed_extensions = [_normalize_extension(ext)
+                                        for ext in args.extensions.split(',') if ext.strip()]
+    extractor.allowed_extensions.extend(_normalize_extension(ext) for ext in args.add_extension)
+    extractor.excluded_patterns.extend(args.exclude)
+    extractor.excluded_folders.extend(args.exclude_folder)
+    extractor.excluded_files.extend(args.exclude_file)
+    if args.max_file_size_mb is not None:
+        extractor.max_file_size = int(args.max_file_size_mb * 1024 * 1024)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Ejecuta una extracción desde la línea de comandos.
+
+    Args:
+        argv: Argumentos (por defecto sys.argv[1:])
+
+    Returns:
+        Código de salida
+    """
+    args = build_parser().parse_args(argv)
+
+    extractor = FileExtractor()
+    configure_extractor(extractor, args)
+
+    start = time.perf_counter()
+    report = {'source': args.source, 'output': args.output}
+    try:
+        processed, errors = extractor.extract_content(
+            args.source, args.output, log_path=args.log,
+            jobs=args.jobs,
+            detect_processes=args.detect_processes,
+            binary_output=args.binary_output or None,
+            use_cache=args.cache or None,
+            incremental=args.incremental,
+            index=args.index,
+            output_format=args.format,
+            compression_level=args.compression_level,
+            threaded_compression=args.threaded_compression or None,
+            skip_binary=False if args.include_binary else None,
+            deduplicate=args.dedup or None,
+            budget_bytes=args.budget_bytes,
+            budget_tokens=args.budget_tokens,
+            budget_policy=args.budget_policy,
+            shard_size=args.shard_size,
+            respect_gitignore=args.gitignore or None,
+            source_mode=args.source_mode,
+            engine=args.engine,
+            max_inflight_bytes=(int(args.max_inflight_mb * 1024 * 1024)
+                                if args.max_inflight_mb is not None else None),
+        )
+    except Exception as e:
+        report.update(fatal=str(e), elapsed_seconds=round(time.perf_counter() - start, 3))
+        _print_report(report)
+        print(str(e), file=sys.stderr)
+        return EXIT_FATAL
+
+    report.update(
+        processed=processed,
+        error_count=len(errors),
+        errors=errors,
+        elapsed_seconds=round(time.perf_counter() - start, 3),
+        stats=extractor.last_stats,
+    )
+    _print_report(report)
+    return EXIT_FILE_ERRORS if errors else EXIT_OK
+
+
+def _normalize_extension(ext: str) -> str:
+    ext = ext.strip().lower()
+    return ext if ext.startswith('.') else '.' + ext
+
+
+def _print_report(report: dict):
+    json.dump(report, sys.stdout, ensure_ascii=False)
+    sys.stdout.write('\n')
+    sys.stdout.flush()
@@ -0,0 +1,159 @@
+"""
+Detección de codificación de archivos.
+
+La detección se hace por niveles, del más barato al más caro:
+
+1. BOM: la marca de orden de bytes decide directamente.
+2. UTF-8 estricto: la mayoría del código fuente es ASCII o UTF-8 válido.
+3. chardet: solo para las muestras que no superan los niveles anteriores.
+
+Las funciones de este módulo trabajan sobre muestras de bytes ya leídas, de
+modo que pueden ejecutarse tanto en el proceso principal como en procesos de
+trabajo (deben poder serializarse con pickle).
+"""
+
+import codecs
+from typing import List, Optional, Tuple
+
+# Niveles que pueden decidir la codificación de un archivo
+TIER_BOM = 'bom'
+TIER_UTF8 = 'utf-8'
+TIER_CHARDET = 'chardet'
+TIER_FALLBACK = 'fallback'
+
+# UTF-32 antes que UTF-16: el BOM de UTF-32 LE empieza por el de UTF-16 LE
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Caracteres de control que no aparecen en texto (se permiten \a \b \t \n \f \r y ESC)
+_CONTROL_BYTES = bytes(set(range(0x20)) - {0x07, 0x08, 0x09, 0x0A, 0x0C, 0x0D, 0x1B}) + b'\x7f'
+
+
+def detect_bom(raw_data: bytes) -> Optional[str]:
+    """Devuelve la codificación indicada por el BOM de la muestra, si lo hay."""
+    for bom, encoding in _BOMS:
+        if raw_data.startswith(bom):
+            return encoding
+    return None
+
+
+def is_binary(raw_data: bytes, control_ratio: float) -> bool:
+    """
+    Decide si una muestra parece contenido binario.
+
+    Las muestras con BOM se consideran texto (UTF-16/32 contienen bytes NUL).
+    Las demás son binarias si tienen algún byte NUL o si la proporción de
+    caracteres de control supera control_ratio.
+
+    Args:
+        raw_data: Primeros bytes del archivo
+        control_ratio: Proporción máxima de caracteres de control en un texto
+
+    Returns:
+        True si la muestra parece binaria
+    """
+    if not raw_data or detect_bom(raw_data):
+        return False
+    if b'\0' in raw_data:
+        return True
+    control = len(raw_data) - len(raw_data.translate(None, _CONTROL_BYTES))
+    return control / len(raw_data) > control_ratio
+
+
+def is_utf8(raw_data: bytes, complete: bool) -> bool:
+    """
+    Comprueba si la muestra es UTF-8 estricto.
+
+    Args:
+        raw_data: Primeros bytes del archivo
+        complete: True si la muestra es el archivo completo; si no, se tolera
+            un carácter multibyte cortado al final de la muestra
+
+    Returns:
+        True si la muestra se decodifica como UTF-8 sin errores
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')('strict')
+    try:
+        decoder.decode(raw_data, final=complete)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_fast(raw_data: bytes, complete: bool) -> Optional[Tuple[str, str]]:
+    """
+    Aplica los niveles baratos (BOM y UTF-8 estricto).
+
+    Returns:
+        Tupla (codificación, nivel) o None si hace falta recurrir a chardet
+    """
+    encoding = detect_bom(raw_data)
+    if encoding:
+        return encoding, TIER_BOM
+    if is_utf8(raw_data, complete):
+        return 'utf-8', TIER_UTF8
+    return None
+
+
+def detect_chardet(raw_data: bytes) -> Tuple[str, str]:
+    """
+    Detecta la codificación de una muestra con chardet.
+
+    Returns:
+        Tupla (codificación, nivel); ('utf-8', TIER_FALLBACK) si chardet no
+        decide
+    """
+    # chardet tarda en importarse y solo hace falta si fallan los niveles rápidos
+    import chardet
+
+    result = chardet.detect(raw_data)
+    if result['encoding']:
+        return result['encoding'], TIER_CHARDET
+    return 'utf-8', TIER_FALLBACK
+
+
+def detect_tiered(raw_data: Optional[bytes], complete: bool) -> Tuple[str, str]:
+    """
+    Detecta la codificación de una muestra recorriendo todos los niveles.
+
+    Args:
+        raw_data: Primeros bytes del archivo (None si no pudo leerse)
+        complete: True si la muestra es el archivo completo
+
+    Returns:
+        Tupla (codificación, nivel que la decidió); 'utf-8' como fallback
+    """
+    if raw_data is None:
+        return 'utf-8', TIER_FALLBACK
+    try:
+        return detect_fast(raw_data, complete) or detect_chardet(raw_data)
+    except Exception:
+        return 'utf-8', TIER_FALLBACK
+
+
+def detect_batch(samples: List[bytes]) -> List[Tuple[str, str]]:
+    """
+    Detecta con chardet la codificación de un lote de muestras.
+
+    Pensada para ejecutarse en un ProcessPoolExecutor: un único envío por
+    lote reduce el coste de serializar las muestras entre procesos. Solo
+    deben enviarse las muestras que no resolvió detect_fast.
+
+    Args:
+        samples: Muestras de bytes
+
+    Returns:
+        Lista de tuplas (codificación, nivel), en el mismo orden que las muestras
+    """
+    encodings = []
+    for raw_data in samples:
+        try:
+            encodings.append(detect_chardet(raw_data))
+        except Exception:
+            encodings.append(('utf-8', TIER_FALLBACK))
+    return encodings
@@ -2,19 +2,158 @@
 Módulo principal para la extracción de contenido de archivos.
 """
 
+import codecs
+import functools
+import io
+import itertools
 import os
-import chardet
-from pathlib import Path
-from typing import List, Tuple, Callable, Optional
-import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterator, List, Sequence, Set, Tuple, Callable, Optional, Union
+from core.budget import BUDGET_POLICIES, budget_to_bytes, estimate_tokens, select_within_budget
+from core.cache import CacheRecord, EncodingCache
+from core.encoding import TIER_UTF8, detect_batch, detect_fast, detect_tiered, is_binary
+from core.incremental import load_state, plan_splices, save_state
+from core.index import IndexEntry, index_path, write_index
+from core.output import OUTPUT_FORMATS, OutputWriter, Section, open_output
+from core.pool import ENGINES, FairExecutor, iter_ordered
+from core.progress import ProgressReporter
+from core.filters import FilterEngine
+from core.git_index import GitIndexError, tracked_files
+from core.gitignore import GitignoreMatcher
+from core.scanner import SOURCE_MODES, DirectoryEntry, FileEntry, ScanManifest, iter_scan, iter_tracked
+from core.shards import plan_shards, shard_path, stale_shards, write_shards_manifest
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
 from config import (
     DEFAULT_EXCLUDED_FILES, 
     DEFAULT_EXCLUDED_FOLDERS,
+    DEFAULT_EXCLUDED_PATTERNS,
     DEFAULT_ALLOWED_EXTENSIONS,
     MAX_FILE_SIZE_MB,
-    ENCODING_DETECTION_BYTES
+    ENCODING_DETECTION_BYTES,
+    DEFAULT_SKIP_BINARY,
+    BINARY_CONTROL_RATIO,
+    STREAMING_THRESHOLD_MB,
+    STREAM_CHUNK_SIZE,
+    DEFAULT_JOBS,
+    DEFAULT_DETECT_PROCESSES,
+    DETECTION_BATCH_SIZE,
+    DEFAULT_BINARY_OUTPUT,
+    DEFAULT_USE_CACHE,
+    CACHE_FILENAME,
+    CACHE_MAX_ENTRIES,
+    CONFIG_DIR,
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_COMPRESSION_LEVEL,
+    DEFAULT_THREADED_COMPRESSION,
+    BYTES_PER_TOKEN,
+    DEFAULT_BUDGET_POLICY,
+    DEFAULT_EXTENSION_PRIORITY,
+    DEFAULT_DEDUPLICATE,
+    DEFAULT_SHARD_WORKERS,
+    DEFAULT_RESPECT_GITIGNORE,
+    DEFAULT_SOURCE_MODE,
+    PROGRESS_MAX_RATE_HZ,
+    DEFAULT_ENGINE,
+    DEFAULT_MAX_INFLIGHT_MB,
+    PIPELINE_MAX_ITEMS,
+    PIPELINE_QUEUE_SIZE,
+    DEFAULT_BATCH_WORKERS,
+    DEFAULT_BATCH_PARALLEL_ROOTS,
+    CANCEL_POLL_INTERVAL
 )
 
+
+@dataclass
+class BatchResult:
+    """Resultado de una carpeta de extract_batch."""
+    source_path: str
+    output_path: str
+    processed_files: int = 0
+    errors: List[str] = field(default_factory=list)
+    stats: dict = field(default_factory=dict)
+    error: Optional[str] = None  # Error crítico: la salida de esta carpeta no se generó
+
+
+class _Cancelled(Exception):
+    """Interrumpe una copia por bloques al cancelar la extracción."""
+
+
+@dataclass
+class FileResult:
+    """Resultado de leer y decodificar un archivo del manifiesto."""
+    entry: FileEntry
+    content: Optional[str] = None
+    data: Optional[bytes] = None  # Bytes UTF-8 que se copian tal cual (salida binaria)
+    encoding: Optional[str] = None
+    tier: Optional[str] = None  # Nivel del detector que decidió la codificación
+    handle: Optional[BinaryIO] = None  # Archivo abierto para copiar por streaming
+    passthrough: bool = False  # El archivo abierto se copia sin decodificar
+    digest: Optional[str] = None  # Hash del contenido original
+    cached: bool = False  # La codificación salió de la caché persistente
+    binary: bool = False  # Contenido binario: el archivo se omite
+    error: Optional[str] = None
+
+
+@dataclass
+class _Run:
+    """Opciones y estado de una ejecución de extract_content."""
+    source_path: str
+    log_path: Optional[str]
+    jobs: int
+    detect_processes: int
+    binary_output: bool
+    engine: str = DEFAULT_ENGINE
+    max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_MB * 1024 * 1024
+    output_format: str = DEFAULT_OUTPUT_FORMAT
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL
+    threaded_compression: bool = DEFAULT_THREADED_COMPRESSION
+    shard_size: Optional[int] = None
+    respect_gitignore: Optional[bool] = None  # None = el valor de la instancia
+    source_mode: Optional[str] = None
+    shared_pool: Optional[FairExecutor] = None  # Pool de hilos compartido por un lote
+    detect_pool: Optional['ProcessPoolExecutor'] = None  # Pool de procesos compartido por un lote
+    skip_binary: bool = True
+    use_cache: bool = False
+    cached: Dict[str, CacheRecord] = field(default_factory=dict)
+    cache_updates: List[tuple] = field(default_factory=list)
+    incremental: bool = False
+    splices: Dict[str, tuple] = field(default_factory=dict)  # Secciones a copiar
+    previous_output: Optional[BinaryIO] = None  # Salida anterior, de donde se copian
+    write_index: bool = False
+    dedup: bool = False
+    dedup_sizes: Set[int] = field(default_factory=set)  # Tamaños compartidos por más de un archivo
+    first_by_digest: Dict[str, str] = field(default_factory=dict)  # Hash -> primer archivo escrito
+    budget: Optional[int] = None  # Máximo de bytes de la salida
+    budget_policy: str = DEFAULT_BUDGET_POLICY
+    extension_priority: List[str] = field(default_factory=list)
+    budget_omitted: Dict[str, FileEntry] = field(default_factory=dict)  # Archivos que no caben
+    budget_reserve: int = 0  # Bytes que aún deben quedar libres para carpetas y resumen
+    sections: List[Section] = field(default_factory=list)
+    total_files: int = 0
+    progress: Optional[ProgressReporter] = None  # Compartido entre partes
+    processed_files: int = 0
+    binary_files: int = 0
+    duplicate_files: int = 0
+    errors: List[str] = field(default_factory=list)
+    stats: dict = field(default_factory=dict)
+    
+    def need_digest(self, entry: FileEntry) -> bool:
+        """Si hay que calcular el hash del contenido de un archivo."""
+        if self.use_cache or self.write_index:
+            return True
+        if self.dedup and self.incremental:
+            # El estado guarda el hash: un archivo de tamaño único puede tener
+            # un duplicado en la siguiente ejecución
+            return True
+        # Solo puede estar duplicado un archivo cuyo tamaño comparte con otro
+        return self.dedup and entry.size in self.dedup_sizes
+
+
 class FileExtractor:
     """Clase principal para extraer contenido de archivos de una carpeta."""
     
@@ -22,17 +161,61 @@ class FileExtractor:
         self.excluded_files = DEFAULT_EXCLUDED_FILES.copy()
         self.excluded_folders = DEFAULT_EXCLUDED_FOLDERS.copy()
         self.allowed_extensions = DEFAULT_ALLOWED_EXTENSIONS.copy()
+        self.excluded_patterns = DEFAULT_EXCLUDED_PATTERNS.copy()
         self.max_file_size = MAX_FILE_SIZE_MB * 1024 * 1024  # Convertir a bytes
+        self.stream_threshold = STREAMING_THRESHOLD_MB * 1024 * 1024
+        self.jobs = DEFAULT_JOBS
+        self.detect_processes = DEFAULT_DETECT_PROCESSES
+        self.binary_output = DEFAULT_BINARY_OUTPUT
+        self.skip_binary = DEFAULT_SKIP_BINARY
+        self.deduplicate = DEFAULT_DEDUPLICATE
+        self.budget_policy = DEFAULT_BUDGET_POLICY
+        self.shard_workers = DEFAULT_SHARD_WORKERS
+        self.extension_priority = DEFAULT_EXTENSION_PRIORITY.copy()
+        self.use_cache = DEFAULT_USE_CACHE
+        self.cache_path = os.path.join(CONFIG_DIR, CACHE_FILENAME)
+        self.output_format = DEFAULT_OUTPUT_FORMAT
+        self.compression_level = DEFAULT_COMPRESSION_LEVEL
+        self.threaded_compression = DEFAULT_THREADED_COMPRESSION
+        self.respect_gitignore = DEFAULT_RESPECT_GITIGNORE
+        self.source_mode = DEFAULT_SOURCE_MODE
+        self.engine = DEFAULT_ENGINE
+        self.batch_workers = DEFAULT_BATCH_WORKERS
+        self.batch_parallel_roots = DEFAULT_BATCH_PARALLEL_ROOTS
+        self.max_inflight_bytes = DEFAULT_MAX_INFLIGHT_MB * 1024 * 1024
         self.progress_callback: Optional[Callable] = None
-        self.cancel_flag = False
+        # Se comprueba dentro de las copias por bloques y en los hilos de trabajo
+        self.cancel_event = threading.Event()
+        self.last_stats: dict = {}
+        self._filters: Optional[FilterEngine] = None
+        self._filters_key: Optional[tuple] = None
         
     def set_progress_callback(self, callback: Callable):
         """Establece la función de callback para reportar progreso."""
         self.progress_callback = callback
         
     def cancel_extraction(self):
-        """Cancela la extracción en curso."""
-        self.cancel_flag = True
+        """
+        Cancela la extracción en curso.
+        
+        Puede llamarse desde cualquier hilo. La salida a medio escribir se
+        descarta y la anterior, si existía, se conserva; en ese caso
+        self.last_stats['cancelled'] es True. Si la salida ya se había
+        publicado, la cancelación no tiene efecto.
+        """
+        self.cancel_event.set()
+    
+    @property
+    def cancel_flag(self) -> bool:
+        """True si se ha pedido cancelar (compatibilidad con el antiguo atributo)."""
+        return self.cancel_event.is_set()
+    
+    @cancel_flag.setter
+    def cancel_flag(self, value: bool):
+        if value:
+            self.cancel_event.set()
+        else:
+            self.cancel_event.clear()
         
     def detect_encoding(self, file_path: str) -> str:
         """
@@ -44,197 +227,1333 @@ class FileExtractor:
         Returns:
             Codificación detectada o 'utf-8' como fallback
         """
-        try:
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(ENCODING_DETECTION_BYTES)
-                result = chardet.detect(raw_data)
-                return result['encoding'] if result['encoding'] else 'utf-8'
-        except Exception:
-            return 'utf-8'
+        return self.detect_encoding_tier(file_path)[0]
     
-    def is_file_allowed(self, file_path: str) -> bool:
+    def detect_encoding_tier(self, file_path: str) -> Tuple[str, str]:
         """
-        Verifica si un archivo debe ser procesado.
+        Detecta la codificación de un archivo con el detector por niveles
+        (BOM, UTF-8 estricto y, solo si ambos fallan, chardet).
         
         Args:
             file_path: Ruta del archivo
             
         Returns:
-            True si el archivo debe ser procesado, False en caso contrario
+            Tupla (codificación, nivel que la decidió)
         """
-        file_name = os.path.basename(file_path)
+        raw_data = self._read_sample(file_path)
+        complete = raw_data is not None and len(raw_data) < ENCODING_DETECTION_BYTES
+        return detect_tiered(raw_data, complete)
+    
+    def build_filters(self) -> FilterEngine:
+        """
+        Compila las listas de exclusión, extensiones y patrones actuales.
         
-        # Verificar archivos excluidos
-        if file_name in self.excluded_files:
-            return False
-            
-        # Verificar extensión
-        _, ext = os.path.splitext(file_name)
-        if ext.lower() not in self.allowed_extensions:
-            return False
+        El motor se reutiliza mientras las listas no cambien, así que cada
+        ejecución compila los filtros una sola vez.
+        
+        Returns:
+            Motor de filtros compilado
+        """
+        key = (tuple(self.excluded_files), tuple(self.excluded_folders),
+               tuple(self.allowed_extensions), tuple(self.excluded_patterns),
+               self.max_file_size)
+        if self._filters is None or key != self._filters_key:
+            self._filters = FilterEngine(
+                excluded_files=self.excluded_files,
+                excluded_folders=self.excluded_folders,
+                allowed_extensions=self.allowed_extensions,
+                excluded_patterns=self.excluded_patterns,
+                max_file_size=self.max_file_size,
+            )
+            self._filters_key = key
+        return self._filters
+    
+    def is_file_allowed(self, file_path: str, rel_path: Optional[str] = None) -> bool:
+        """
+        Verifica si un archivo debe ser procesado.
+        
+        Args:
+            file_path: Ruta del archivo
+            rel_path: Ruta relativa a la carpeta de origen, para los patrones
+                con '/' (por defecto se usa file_path)
             
-        # Verificar tamaño del archivo
+        Returns:
+            True si el archivo debe ser procesado, False en caso contrario
+        """
         try:
-            if os.path.getsize(file_path) > self.max_file_size:
-                return False
+            file_size = os.path.getsize(file_path)
         except OSError:
             return False
-            
-        return True
+        
+        return self.build_filters().is_file_allowed(
+            rel_path or file_path, os.path.basename(file_path), file_size
+        )
     
-    def is_folder_allowed(self, folder_path: str) -> bool:
+    def is_folder_allowed(self, folder_path: str, rel_path: Optional[str] = None) -> bool:
         """
         Verifica si una carpeta debe ser procesada.
         
         Args:
             folder_path: Ruta de la carpeta
+            rel_path: Ruta relativa a la carpeta de origen, para los patrones
+                con '/' (por defecto se usa folder_path)
             
         Returns:
             True si la carpeta debe ser procesada, False en caso contrario
         """
-        folder_name = os.path.basename(folder_path)
-        return folder_name not in self.excluded_folders
+        folder_name = os.path.basename(os.path.normpath(folder_path))
+        return self.build_filters().is_folder_allowed(rel_path or folder_path, folder_name)
+    
+    def scan(self, source_path: str, respect_gitignore: Optional[bool] = None,
+             source_mode: Optional[str] = None) -> ScanManifest:
+        """
+        Escanea la carpeta de origen una sola vez y construye el manifiesto.
+        
+        Args:
+            source_path: Ruta de origen
+            respect_gitignore: Omite lo ignorado por los .gitignore y por
+                .git/info/exclude (por defecto self.respect_gitignore)
+            source_mode: 'walk' recorre el disco; 'git' toma la lista de
+                archivos del índice de git (sin recorrer carpetas) y vuelve a
+                'walk' si no hay repositorio (por defecto self.source_mode)
+            
+        Returns:
+            Manifiesto con la ruta, tamaño, fecha de modificación, extensión y
+            estado de cada archivo encontrado
+        """
+        if respect_gitignore is None:
+            respect_gitignore = self.respect_gitignore
+        source_mode = source_mode or self.source_mode
+        if source_mode not in SOURCE_MODES:
+            raise ValueError(f"Modo de origen no soportado: {source_mode}")
+        filters = self.build_filters()
+        manifest = ScanManifest(source_path)
+        
+        if source_mode == 'git':
+            try:
+                rel_paths = tracked_files(source_path)
+            except GitIndexError as e:
+                _log_warning("No se pudo leer el índice de git de %s, se recorre el disco: %s", source_path, e)
+                rel_paths = None
+            if rel_paths is not None:
+                # Los archivos versionados no están sujetos a .gitignore
+                manifest.directories.extend(
+                    iter_tracked(source_path, rel_paths, filters.is_folder_allowed, filters.is_file_allowed)
+                )
+                return manifest
+        
+        ignore = GitignoreMatcher.for_source(source_path) if respect_gitignore else None
+        manifest.directories.extend(
+            iter_scan(source_path, filters.is_folder_allowed, filters.is_file_allowed, ignore)
+        )
+        return manifest
     
-    def count_files(self, source_path: str) -> int:
+    def count_files(self, source_path: str, manifest: Optional[ScanManifest] = None) -> int:
         """
         Cuenta el total de archivos a procesar para el progreso.
         
         Args:
             source_path: Ruta de origen
+            manifest: Manifiesto ya escaneado (opcional, evita recorrer de nuevo)
             
         Returns:
             Número total de archivos a procesar
         """
-        total_files = 0
+        if manifest is None:
+            manifest = self.scan(source_path)
+        return manifest.total_allowed
+    
+    def _read_file(self, entry: FileEntry, run: _Run) -> FileResult:
+        """
+        Lee un archivo una sola vez, detecta su codificación sobre los primeros
+        bytes y lo decodifica en memoria.
+        
+        Si la caché persistente tiene la codificación de este archivo, no se
+        vuelve a detectar. Con run.skip_binary, los archivos cuya muestra
+        parece binaria se omiten antes de decodificarlos. Los archivos mayores que stream_threshold no se
+        cargan enteros: se devuelven abiertos para que el escritor los copie
+        por bloques.
+        
+        Se ejecuta en los hilos de trabajo, por lo que no lanza excepciones:
+        los errores se devuelven en el resultado.
+        
+        Args:
+            entry: Archivo del manifiesto
+            run: Ejecución en curso
+            
+        Returns:
+            FileResult con el contenido decodificado o el error producido
+        """
+        loaded = self._load_entry(entry, run)
+        if isinstance(loaded, FileResult):
+            return loaded
+        data, handle, sample, complete = loaded
+        
+        record = run.cached.get(entry.path)
+        if self._sniff_binary(sample, handle, record, run):
+            return FileResult(entry, binary=True)
+        if record is not None:
+            return self._finish(entry, data, handle, (record.encoding, record.tier), run, record)
+        return self._finish(entry, data, handle, detect_tiered(sample, complete), run)
+    
+    def _load_entry(self, entry: FileEntry, run: _Run) -> Union[FileResult, tuple]:
+        """
+        Carga un archivo del manifiesto, sin detectar aún su codificación.
+        
+        Returns:
+            El resultado definitivo si ya se conoce (cancelación, binario según
+            la caché o error de lectura); si no, la tupla de _load
+        """
+        if self.cancel_event.is_set():
+            return FileResult(entry, error="Extracción cancelada")
+        
+        record = run.cached.get(entry.path)
+        if record is not None and record.is_binary:
+            return FileResult(entry, binary=True, cached=True)
+        
+        try:
+            return self._load(entry)
+        except Exception as e:
+            return FileResult(entry, error=str(e))
+    
+    def _load(self, entry: FileEntry) -> Tuple[Optional[bytes], Optional[BinaryIO], bytes, bool]:
+        """
+        Abre un archivo y lo carga en memoria, o lo deja abierto si es grande.
+        
+        Returns:
+            Tupla (contenido o None, archivo abierto o None, muestra para
+            detectar la codificación, True si la muestra es el archivo completo)
+        """
+        f = open(entry.path, 'rb')
+        try:
+            if entry.size is not None and entry.size > self.stream_threshold:
+                sample = f.read(ENCODING_DETECTION_BYTES)
+                f.seek(0)
+                return None, f, sample, len(sample) < ENCODING_DETECTION_BYTES
+            data = f.read()
+        except BaseException:
+            f.close()
+            raise
+        f.close()
+        return data, None, data[:ENCODING_DETECTION_BYTES], len(data) <= ENCODING_DETECTION_BYTES
+    
+    def _finish(self, entry: FileEntry, data: Optional[bytes], handle: Optional[BinaryIO],
+                detected: Tuple[str, str], run: _Run,
+                record: Optional[CacheRecord] = None) -> FileResult:
+        """Decodifica en memoria el contenido ya leído, o prepara su streaming."""
+        result = self._prepare(entry, data, handle, detected, run.binary_output)
+        if record is not None:
+            result.cached = True
+            result.digest = record.digest
+        if result.error is None and result.digest is None and run.need_digest(entry):
+            try:
+                result.digest = _content_digest(data, result.handle, self.cancel_event)
+            except Exception as e:
+                if result.handle is not None:
+                    result.handle.close()
+                return FileResult(entry, error=str(e))
+        return result
+    
+    def _prepare(self, entry: FileEntry, data: Optional[bytes], handle: Optional[BinaryIO],
+                 detected: Tuple[str, str], binary_output: bool) -> FileResult:
+        """Prepara el resultado de un archivo según la codificación detectada."""
+        encoding, tier = detected
+        try:
+            # En salida binaria, los archivos UTF-8 (sin BOM) no se decodifican
+            if binary_output and tier == TIER_UTF8:
+                # Solo la muestra pasó la comprobación: se valida el archivo
+                # completo antes de copiarlo sin decodificar; si no es UTF-8
+                # válido se transcodifica como el resto
+                if handle is not None and _is_valid_utf8_stream(handle, self.cancel_event):
+                    return FileResult(entry, encoding=encoding, tier=tier,
+                                      handle=handle, passthrough=True)
+                if handle is None and (data.isascii() or _is_valid_utf8(data)):
+                    return FileResult(entry, data=data, encoding=encoding, tier=tier)
+            
+            if handle is not None:
+                # Validar la codificación antes de que el escritor empiece la sección
+                codecs.lookup(encoding)
+                return FileResult(entry, encoding=encoding, tier=tier, handle=handle)
+            
+            content = data.decode(encoding, errors='replace')
+            # Misma conversión de saltos de línea que la lectura en modo texto
+            if not binary_output and '\r' in content:
+                content = content.replace('\r\n', '\n').replace('\r', '\n')
+            
+            return FileResult(entry, content=content, encoding=encoding, tier=tier)
+        except Exception as e:
+            if handle is not None:
+                handle.close()
+            return FileResult(entry, error=str(e))
+    
+    def _sniff_binary(self, sample: bytes, handle: Optional[BinaryIO],
+                      record: Optional[CacheRecord], run: _Run) -> bool:
+        """
+        Decide si un archivo recién cargado se omite por ser binario.
         
-        for root, dirs, files in os.walk(source_path):
-            # Filtrar carpetas excluidas
-            dirs[:] = [d for d in dirs if self.is_folder_allowed(os.path.join(root, d))]
+        Solo se examina la muestra ya leída para detectar la codificación; si
+        el archivo se omite, se cierra el archivo abierto para streaming.
+        """
+        if not run.skip_binary or (record is not None and record.is_binary is not None):
+            return False
+        if not is_binary(sample, BINARY_CONTROL_RATIO):
+            return False
+        if handle is not None:
+            handle.close()
+        return True
+    
+    def _read_sample(self, file_path: str) -> Optional[bytes]:
+        """Lee los primeros bytes de un archivo para detectar su codificación."""
+        try:
+            with open(file_path, 'rb') as f:
+                return f.read(ENCODING_DETECTION_BYTES)
+        except Exception:
+            return None
+    
+    def _read_batch(self, detect_pool: 'ProcessPoolExecutor', run: _Run,
+                    batch: List[FileEntry]) -> List[FileResult]:
+        """
+        Lee un lote de archivos delegando en el pool de procesos, con un único
+        envío, las muestras que los niveles rápidos del detector no resuelven.
+        """
+        if self.cancel_event.is_set():
+            return [FileResult(entry, error="Extracción cancelada") for entry in batch]
+        
+        loaded = []
+        detected = []
+        pending = []  # Índices de las muestras que necesitan chardet
+        samples = []
+        for entry in batch:
+            item = self._load_entry(entry, run)
+            if isinstance(item, FileResult):
+                loaded.append(item)
+                detected.append(None)
+                continue
+            data, handle, sample, complete = item
+            record = run.cached.get(entry.path)
+            if self._sniff_binary(sample, handle, record, run):
+                loaded.append(FileResult(entry, binary=True))
+                detected.append(None)
+                continue
+            loaded.append((data, handle))
             
-            for file in files:
-                file_path = os.path.join(root, file)
-                if self.is_file_allowed(file_path):
-                    total_files += 1
+            if record is not None:
+                detected.append((record.encoding, record.tier))
+                continue
+            fast = detect_fast(sample, complete)
+            if fast is None:
+                pending.append(len(detected))
+                samples.append(sample)
+            detected.append(fast)
+        
+        if samples:
+            future = detect_pool.submit(detect_batch, samples)
+            # Esperar por intervalos cortos para atender una cancelación sin
+            # aguardar a que chardet termine con el lote
+            while not future.done() and not self.cancel_event.wait(CANCEL_POLL_INTERVAL):
+                pass
+            if not future.done():
+                future.cancel()
+                for item in loaded:
+                    if not isinstance(item, FileResult) and item[1] is not None:
+                        item[1].close()
+                return [FileResult(entry, error="Extracción cancelada") for entry in batch]
+            try:
+                slow = future.result()
+            except Exception:
+                # Si el pool de procesos falla, detectar en este mismo proceso
+                slow = detect_batch(samples)
+            for index, value in zip(pending, slow):
+                detected[index] = value
+        
+        results = []
+        for entry, item, value in zip(batch, loaded, detected):
+            if isinstance(item, FileResult):
+                results.append(item)
+            else:
+                results.append(self._finish(entry, item[0], item[1], value, run,
+                                            run.cached.get(entry.path)))
+        return results
+    
+    def _iter_results(self, entries: List[FileEntry], run: _Run) -> Iterator[FileResult]:
+        """
+        Lee los archivos en paralelo y devuelve los resultados en orden.
+        
+        Si run.detect_processes > 0, la detección de codificación se hace por
+        lotes en un pool de procesos que se inicia una sola vez por extracción.
+        Con run.engine == 'asyncio' se usa _iter_pipeline. Dentro de un lote,
+        los hilos y procesos son los compartidos de run.shared_pool y
+        run.detect_pool.
+        """
+        if run.engine == 'asyncio':
+            yield from self._iter_pipeline(entries, run)
+            return
+        executor = run.shared_pool.client() if run.shared_pool is not None else None
+        if run.detect_processes <= 0:
+            read_file = functools.partial(self._read_file, run=run)
+            yield from iter_ordered(read_file, entries, run.jobs, executor=executor)
+            return
+        
+        detect_pool = run.detect_pool
+        if detect_pool is None:
+            # El pool de procesos solo se importa si se usa
+            from concurrent.futures import ProcessPoolExecutor
+            detect_pool = ProcessPoolExecutor(max_workers=run.detect_processes)
+        try:
+            # Al menos un hilo por proceso para mantenerlos ocupados
+            threads = max(run.jobs, run.detect_processes)
+            # La ventana se cuenta en lotes, pero cada archivo grande de un lote
+            # queda abierto hasta escribirse: se acotan los archivos en vuelo
+            # (4 por hilo, o un lote completo si son más) achicando los lotes
+            window = 2 * threads
+            max_files = max(4 * threads, DETECTION_BATCH_SIZE)
+            batch_size = max(1, min(DETECTION_BATCH_SIZE, max_files // window))
+            batches = [entries[i:i + batch_size] for i in range(0, len(entries), batch_size)]
+            read_batch = functools.partial(self._read_batch, detect_pool, run)
+            for batch_results in iter_ordered(read_batch, batches, threads, window=window,
+                                              executor=executor):
+                yield from batch_results
+        finally:
+            if detect_pool is not run.detect_pool:
+                # Al cancelar no se espera a que los procesos terminen el lote en curso
+                detect_pool.shutdown(wait=not self.cancel_event.is_set(), cancel_futures=True)
+    
+    def _iter_pipeline(self, entries: List[FileEntry], run: _Run) -> Iterator[FileResult]:
+        """
+        Motor asyncio: lectura y decodificación como etapas separadas.
+        
+        La lectura usa su propio pool de hilos, de modo que un disco lento no
+        frena la decodificación, y chardet se ejecuta en el pool de procesos si
+        run.detect_processes > 0. Cada archivo ocupa, mientras está en vuelo,
+        lo que se carga en memoria (la muestra, si se copia por streaming);
+        run.max_inflight_bytes limita el total hasta que el escritor lo recibe.
+        """
+        # asyncio solo se importa si se usa este motor
+        from core.pipeline import iter_pipeline
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        
+        decode_workers = max(run.jobs, run.detect_processes, 1)
+        if run.shared_pool is not None:
+            # En un lote, las dos etapas comparten el pool del lote
+            read_pool = decode_pool = run.shared_pool.client()
+        else:
+            read_pool = ThreadPoolExecutor(max_workers=max(run.jobs, 1), thread_name_prefix='extractor-read')
+            decode_pool = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix='extractor-decode')
+        detect_pool = run.detect_pool or decode_pool
+        if run.detect_processes > 0 and run.detect_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            detect_pool = ProcessPoolExecutor(max_workers=run.detect_processes)
+        
+        async def read(entry: FileEntry):
+            loop = asyncio.get_running_loop()
+            return entry, await loop.run_in_executor(read_pool, self._load_entry, entry, run)
+        
+        async def decode(job) -> FileResult:
+            entry, loaded = job
+            if isinstance(loaded, FileResult):
+                return loaded
+            data, handle, sample, complete = loaded
+            record = run.cached.get(entry.path)
+            if self._sniff_binary(sample, handle, record, run):
+                return FileResult(entry, binary=True)
+            
+            loop = asyncio.get_running_loop()
+            if record is not None:
+                detected = (record.encoding, record.tier)
+            else:
+                detected = detect_fast(sample, complete)
+                if detected is None:
+                    try:
+                        detected = (await loop.run_in_executor(detect_pool, detect_batch, [sample]))[0]
+                    except Exception:
+                        # Si el pool de procesos falla, detectar en un hilo
+                        detected = (await loop.run_in_executor(decode_pool, detect_batch, [sample]))[0]
+            return await loop.run_in_executor(decode_pool, self._finish, entry, data, handle,
+                                              detected, run, record)
+        
+        def weight(entry: FileEntry) -> int:
+            size = entry.size or 0
+            return size if size <= self.stream_threshold else ENCODING_DETECTION_BYTES
+        
+        def streamed(entry: FileEntry) -> bool:
+            return (entry.size or 0) > self.stream_threshold
+        
+        # Cada archivo por streaming queda abierto hasta escribirse: como en el
+        # motor de hilos, como mucho 4 por hilo de decodificación
+        results = iter_pipeline(entries, [(read, max(run.jobs, 1)), (decode, decode_workers)], weight,
+                                run.max_inflight_bytes, PIPELINE_MAX_ITEMS, PIPELINE_QUEUE_SIZE,
+                                pinned=streamed, max_pinned=4 * decode_workers)
+        try:
+            yield from results
+        finally:
+            results.close()
+            cancelled = self.cancel_event.is_set()
+            read_pool.shutdown(wait=True, cancel_futures=True)
+            decode_pool.shutdown(wait=True, cancel_futures=True)
+            if detect_pool is not decode_pool and detect_pool is not run.detect_pool:
+                detect_pool.shutdown(wait=not cancelled, cancel_futures=True)
+    
+    def _write_section(self, output: OutputWriter, result: FileResult, run: _Run):
+        """
+        Escribe la sección de un archivo en la salida.
+        
+        Los archivos abiertos para streaming se copian por bloques con un
+        decodificador incremental, de modo que la memoria no depende de su
+        tamaño; en salida binaria, los UTF-8 se copian dentro del núcleo.
+        """
+        relative_file_path = result.entry.rel_path
+        output.write(f"--- Inicio del archivo: {relative_file_path} ---\n")
+        try:
+            if result.data is not None:
+                output.write_bytes(result.data)
+                ends_with_newline = result.data.endswith(b'\n')
+            elif result.passthrough:
+                with result.handle as f:
+                    size = os.fstat(f.fileno()).st_size
+                    if output.copy_from(f, size, self.cancel_event) < size and self.cancel_event.is_set():
+                        raise _Cancelled()
+                    ends_with_newline = False
+                    if size:
+                        f.seek(size - 1)
+                        ends_with_newline = f.read(1) == b'\n'
+                run.stats['passthrough_bytes'] = run.stats.get('passthrough_bytes', 0) + size
+            elif result.handle is not None:
+                last_char = ''
+                newline = '' if run.binary_output else None
+                with io.TextIOWrapper(result.handle, encoding=result.encoding,
+                                      errors='replace', newline=newline) as reader:
+                    while True:
+                        if self.cancel_event.is_set():
+                            raise _Cancelled()
+                        chunk = reader.read(STREAM_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        output.write(chunk)
+                        last_char = chunk[-1]
+                ends_with_newline = last_char == '\n'
+            else:
+                output.write(result.content)
+                ends_with_newline = result.content.endswith('\n')
+            if not ends_with_newline:
+                output.write('\n')
+        finally:
+            output.write(f"--- Fin del archivo: {relative_file_path} ---\n\n")
+    
+    def _write_output(self, output: OutputWriter, manifest: ScanManifest, run: _Run):
+        """Escribe encabezado, carpetas, secciones de archivos y resumen."""
+        tiers = run.stats.setdefault('encoding_tiers', {})
+        
+        if run.budget is not None:
+            self._plan_budget(output, manifest, run)
+        
+        # Escribir encabezado
+        output.write(self._header_text(run.source_path, run.total_files))
+        
+        to_read = [entry for entry in manifest.allowed_files
+                   if entry.rel_path not in run.splices and entry.path not in run.budget_omitted]
+        results = self._iter_results(to_read, run)
+        
+        try:
+            for directory in manifest.directories:
+                if self.cancel_event.is_set():
+                    break
+                
+                # Escribir información de la carpeta (y si está vacía)
+                folder_text = self._folder_text(directory)
+                output.write(folder_text)
+                if run.budget is not None:
+                    run.budget_reserve -= len(output.encode(folder_text))
+                
+                # Procesar archivos
+                for entry in directory.allowed_files:
+                    if self.cancel_event.is_set():
+                        break
+                    if entry.path in run.budget_omitted:
+                        if run.progress is not None:
+                            run.progress.advance(entry.size or 0)
+                        continue
                     
-        return total_files
+                    # El archivo cuenta como hecho cuando su sección (o su descarte) termina
+                    if run.progress is not None:
+                        run.progress.start(entry.name)
+                    try:
+                        section_start = output.offset
+                        splice = run.splices.get(entry.rel_path)
+                        if (splice is not None and run.budget is not None
+                                and not self._fits_budget(output, entry, splice[1], run)):
+                            continue
+                        if splice is not None and self._write_duplicate(output, entry, splice[3], run):
+                            run.sections.append(Section(entry, section_start, output.offset - section_start,
+                                                        splice[2], splice[3],
+                                                        run.first_by_digest[splice[3]]))
+                            run.processed_files += 1
+                            continue
+                        if splice is not None:
+                            # Archivo sin cambios: copiar su sección de la salida anterior
+                            self._copy_previous_section(output, splice, run)
+                            run.sections.append(Section(entry, section_start, output.offset - section_start,
+                                                        splice[2], splice[3]))
+                            self._remember_digest(entry, splice[3], run)
+                            run.processed_files += 1
+                            continue
+                    
+                        result = next(results)
+                        if result.error is not None and self.cancel_event.is_set():
+                            break
+                        if result.binary:
+                            # Contenido binario: no se escribe sección
+                            run.binary_files += 1
+                            if run.use_cache and not result.cached:
+                                run.cache_updates.append((entry, CacheRecord('', '', None, True)))
+                            continue
+                        if result.error is None and run.budget is not None and not self._result_fits_budget(output, result, run):
+                            continue
+                        duplicate_of = None
+                        if result.error is None:
+                            # Escribir contenido al archivo de salida
+                            try:
+                                if self._write_duplicate(output, entry, result.digest, run):
+                                    duplicate_of = run.first_by_digest[result.digest]
+                                    if result.handle is not None:
+                                        result.handle.close()
+                                else:
+                                    self._write_section(output, result, run)
+                                    if run.budget is not None and output.offset + run.budget_reserve > run.budget:
+                                        # El tamaño estimado de la copia por streaming se quedó corto
+                                        output.truncate(section_start)
+                                        run.budget_omitted[entry.path] = entry
+                                        continue
+                                    self._remember_digest(entry, result.digest, run)
+                            except _Cancelled:
+                                break
+                            except Exception as e:
+                                result.error = str(e)
+                    
+                        if result.error is None:
+                            run.sections.append(Section(entry, section_start, output.offset - section_start,
+                                                        result.encoding, result.digest, duplicate_of))
+                            run.processed_files += 1
+                            tiers[result.tier] = tiers.get(result.tier, 0) + 1
+                            if run.use_cache and not result.cached:
+                                run.cache_updates.append((entry, CacheRecord(
+                                    result.encoding, result.tier, result.digest,
+                                    False if run.skip_binary else None)))
+                        else:
+                            self._record_error(run, f"Error al procesar {entry.path}: {result.error}")
+                    finally:
+                        if run.progress is not None:
+                            run.progress.advance(entry.size or 0)
+        finally:
+            results.close()
+        
+        if self.cancel_event.is_set():
+            # La salida se descarta: no hace falta resumen
+            return
+        
+        # Escribir resumen final
+        output.write(self._summary_text(run))
+        run.stats['binary_skipped'] = run.binary_files
+        if run.dedup:
+            run.stats['duplicate_files'] = run.duplicate_files
+        if run.budget is not None:
+            run.stats['budget_bytes'] = run.budget
+            run.stats['estimated_tokens'] = estimate_tokens(output.offset, BYTES_PER_TOKEN)
+            run.stats['budget_omitted'] = [entry.rel_path for entry in run.budget_omitted.values()]
+    
+    def _header_text(self, source_path: str, total_files: int) -> str:
+        """Encabezado de la salida."""
+        return (f"=== EXTRACCIÓN DE CÓDIGO ===\n"
+                f"Carpeta origen: {source_path}\n"
+                f"Total de archivos a procesar: {total_files}\n"
+                f"{'='*50}\n\n")
+    
+    def _folder_text(self, directory: DirectoryEntry) -> str:
+        """Línea de una carpeta, con la marca de carpeta vacía si corresponde."""
+        text = f"--- Carpeta: {directory.rel_path} ---\n"
+        if not directory.allowed_files and not directory.subdirs:
+            text += "(Carpeta vacía)\n\n"
+        return text
+    
+    def _summary_text(self, run: _Run, bound: Optional[int] = None) -> str:
+        """
+        Bloque de resumen final.
+        
+        Con bound, devuelve el resumen más largo posible con bound archivos,
+        para reservar su espacio en el presupuesto.
+        """
+        processed = errors = binary = duplicates = omitted = bound
+        if bound is None:
+            processed, errors = run.processed_files, len(run.errors)
+            binary, duplicates, omitted = run.binary_files, run.duplicate_files, len(run.budget_omitted)
+        
+        lines = [
+            f"\n{'='*50}\n",
+            f"=== RESUMEN DE EXTRACCIÓN ===\n",
+            f"Archivos procesados exitosamente: {processed}\n",
+            f"Errores encontrados: {errors}\n",
+        ]
+        if binary:
+            lines.append(f"Archivos binarios omitidos: {binary}\n")
+        if duplicates:
+            lines.append(f"Archivos duplicados (solo referencia): {duplicates}\n")
+        if omitted:
+            lines.append(f"Archivos omitidos por el presupuesto: {omitted}\n")
+        lines.append(f"{'='*50}\n")
+        return ''.join(lines)
     
-    def extract_content(self, source_path: str, output_path: str, log_path: Optional[str] = None) -> Tuple[int, List[str]]:
+    def _plan_budget(self, output: OutputWriter, manifest: ScanManifest, run: _Run):
+        """
+        Elige, antes de leer ningún archivo, los que caben en run.budget.
+        
+        Del presupuesto se descuenta primero lo que se escribe siempre: el
+        encabezado, las líneas de carpeta y el resumen más largo posible.
+        """
+        entries = manifest.allowed_files
+        header = len(output.encode(self._header_text(run.source_path, len(entries))))
+        folders = sum(len(output.encode(self._folder_text(directory)))
+                      for directory in manifest.directories)
+        summary = len(output.encode(self._summary_text(run, bound=len(entries))))
+        available = run.budget - header - folders - summary
+        if available < 0:
+            raise ValueError(f"El presupuesto ({run.budget} bytes) no alcanza para la estructura "
+                             f"de la salida ({run.budget - available} bytes)")
+        
+        def estimated_cost(entry: FileEntry) -> int:
+            splice = run.splices.get(entry.rel_path)
+            if splice is not None:
+                return splice[1]
+            return self._markers_length(output, entry) + (entry.size or 0)
+        
+        selected, omitted = select_within_budget(entries, available, run.budget_policy,
+                                                 run.extension_priority, estimated_cost)
+        run.budget_omitted = {entry.path: entry for entry in omitted}
+        run.total_files = len(selected)
+        run.budget_reserve = folders + summary
+    
+    def _markers_length(self, output: OutputWriter, entry: FileEntry) -> int:
+        """Bytes de los marcadores de una sección, con el salto de línea final que pueda añadirse."""
+        return (len(output.encode(f"--- Inicio del archivo: {entry.rel_path} ---\n"))
+                + len(output.encode("\n"))
+                + len(output.encode(f"--- Fin del archivo: {entry.rel_path} ---\n\n")))
+    
+    def _fits_budget(self, output: OutputWriter, entry: FileEntry, length: int, run: _Run) -> bool:
+        """
+        Comprueba, justo antes de escribirla, que una sección cabe en el
+        presupuesto; si no, el archivo pasa a la lista de omitidos.
+        """
+        if output.offset + length + run.budget_reserve <= run.budget:
+            return True
+        run.budget_omitted[entry.path] = entry
+        return False
+    
+    def _result_fits_budget(self, output: OutputWriter, result: FileResult, run: _Run) -> bool:
+        """
+        Calcula el tamaño de la sección de un archivo leído y comprueba que cabe.
+        
+        El contenido decodificado en memoria se codifica aquí una sola vez y se
+        escribe después tal cual, así que su tamaño es exacto. Los archivos que
+        se copian por streaming se estiman por su tamaño y, si al escribirlos no
+        caben, se trunca la salida; si la salida no admite truncar (formatos
+        comprimidos) se usa una cota: cada byte de origen produce como mucho 3
+        bytes de UTF-8.
+        """
+        entry = result.entry
+        first = run.first_by_digest.get(result.digest) if run.dedup and result.digest else None
+        if first is not None:
+            length = len(output.encode(f"--- Archivo duplicado: {entry.rel_path} (idéntico a {first}) ---\n\n"))
+        else:
+            if result.content is not None:
+                result.data, result.content = output.encode(result.content), None
+            if result.data is not None:
+                content_length = len(result.data)
+            elif result.passthrough:
+                content_length = os.fstat(result.handle.fileno()).st_size
+            else:
+                size = os.fstat(result.handle.fileno()).st_size
+                content_length = size if output.can_truncate else 3 * size
+            length = self._markers_length(output, entry) + content_length
+        
+        if self._fits_budget(output, entry, length, run):
+            return True
+        if result.handle is not None:
+            result.handle.close()
+        return False
+    
+    def _write_duplicate(self, output: OutputWriter, entry: FileEntry,
+                         digest: Optional[str], run: _Run) -> bool:
+        """
+        Escribe una sección de referencia si ya se escribió un archivo idéntico.
+        
+        Returns:
+            True si el archivo era un duplicado y se escribió la referencia
+        """
+        if not run.dedup or digest is None:
+            return False
+        first = run.first_by_digest.get(digest)
+        if first is None:
+            return False
+        output.write(f"--- Archivo duplicado: {entry.rel_path} (idéntico a {first}) ---\n\n")
+        run.duplicate_files += 1
+        return True
+    
+    def _remember_digest(self, entry: FileEntry, digest: Optional[str], run: _Run):
+        """Registra el primer archivo escrito con un contenido dado."""
+        if run.dedup and digest is not None:
+            run.first_by_digest.setdefault(digest, entry.rel_path)
+    
+    def _copy_previous_section(self, output: OutputWriter, splice: tuple, run: _Run):
+        """Copia byte a byte una sección de la salida anterior."""
+        offset, length = splice[:2]
+        run.previous_output.seek(offset)
+        if output.copy_from(run.previous_output, length) != length:
+            raise IOError("La salida anterior está incompleta")
+        run.stats['spliced_files'] = run.stats.get('spliced_files', 0) + 1
+    
+    def _record_error(self, run: _Run, error_msg: str):
+        """Registra un error de un archivo y lo añade al log si hay uno."""
+        run.errors.append(error_msg)
+        
+        # Log del error
+        if run.log_path:
+            try:
+                with open(run.log_path, 'a', encoding='utf-8') as log_file:
+                    log_file.write(f"[ERROR] {error_msg}\n")
+            except Exception:
+                pass  # Si no se puede escribir el log, continuar
+    
+    def extract_content(self, source_path: str, output_path: str, log_path: Optional[str] = None,
+                        jobs: Optional[int] = None,
+                        detect_processes: Optional[int] = None,
+                        binary_output: Optional[bool] = None,
+                        use_cache: Optional[bool] = None,
+                        incremental: bool = False,
+                        index: bool = False,
+                        output_format: Optional[str] = None,
+                        compression_level: Optional[int] = None,
+                        threaded_compression: Optional[bool] = None,
+                        skip_binary: Optional[bool] = None,
+                        deduplicate: Optional[bool] = None,
+                        budget_bytes: Optional[int] = None,
+                        budget_tokens: Optional[int] = None,
+                        budget_policy: Optional[str] = None,
+                        shard_size: Optional[int] = None,
+                        respect_gitignore: Optional[bool] = None,
+                        source_mode: Optional[str] = None,
+                        engine: Optional[str] = None,
+                        max_inflight_bytes: Optional[int] = None) -> Tuple[int, List[str]]:
         """
         Extrae el contenido de todos los archivos permitidos en una carpeta.
         
+        Con jobs > 1 los archivos se leen y decodifican en un pool de hilos,
+        pero se escriben en el mismo orden que una ejecución secuencial, por lo
+        que la salida es idéntica.
+        
+        Con detect_processes > 0 chardet se ejecuta en un pool de procesos,
+        evitando el GIL.
+        
+        En salida binaria los archivos UTF-8 se copian tal cual, sin convertir
+        saltos de línea (los grandes, dentro del núcleo); el resto se
+        transcodifica a UTF-8. Solo los encabezados se escriben desde Python.
+        
+        Con use_cache, la caché persistente (self.cache_path) se consulta antes
+        de leer ningún archivo: los que no han cambiado desde la ejecución
+        anterior no vuelven a pasar por el detector de codificación.
+        
+        En modo incremental se guarda junto a la salida un manifiesto con la
+        posición de cada sección. En la siguiente ejecución, las secciones de
+        los archivos sin cambios se copian de la salida anterior y solo se leen
+        los archivos nuevos o modificados.
+        
         Args:
             source_path: Carpeta de origen
             output_path: Archivo de salida
             log_path: Archivo de log de errores (opcional)
+            jobs: Hilos de lectura en paralelo (por defecto self.jobs)
+            detect_processes: Procesos para detectar codificación (por defecto
+                self.detect_processes; 0 = en el propio proceso)
+            binary_output: Activa la salida binaria (por defecto self.binary_output)
+            use_cache: Usa la caché persistente (por defecto self.use_cache)
+            incremental: Reutiliza las secciones sin cambios de la salida anterior
+            index: Escribe junto a la salida un índice (<salida>.idx) con la
+                posición de cada sección, legible con core.index.SectionIndex
+            output_format: 'text' (por defecto) o un formato comprimido al vuelo:
+                'gzip', 'xz' o 'bz2' (por defecto self.output_format)
+            compression_level: Nivel de compresión 1-9 (por defecto
+                self.compression_level)
+            threaded_compression: Comprime en un hilo aparte, solapado con la
+                lectura (por defecto self.threaded_compression)
+            skip_binary: Omite los archivos cuyo contenido parece binario (por
+                defecto self.skip_binary)
+            deduplicate: Escribe completo solo el primero de varios archivos
+                idénticos; los demás llevan una sección de una línea que lo
+                referencia (por defecto self.deduplicate)
+            budget_bytes: Tamaño máximo de la salida en bytes (sin comprimir)
+            budget_tokens: Tamaño máximo de la salida en tokens estimados
+                (BYTES_PER_TOKEN bytes por token)
+            budget_policy: Cómo elegir los archivos que caben en el presupuesto:
+                'order', 'smallest' o 'extension' (según self.extension_priority);
+                por defecto self.budget_policy. Los omitidos quedan en
+                self.last_stats['budget_omitted']
+            shard_size: Divide la salida en partes (salida.001.txt, salida.002.txt,
+                ...) de como mucho shard_size bytes estimados, escritas en
+                paralelo (self.shard_workers a la vez); salida.shards.json las
+                enumera
+            respect_gitignore: Omite lo ignorado por los .gitignore (por
+                defecto self.respect_gitignore)
+            source_mode: 'walk' o 'git' (por defecto self.source_mode)
+            engine: 'threads' lee y decodifica cada archivo en un pool de hilos
+                con una ventana de archivos; 'asyncio' separa lectura y
+                decodificación en etapas unidas por colas acotadas (por
+                defecto self.engine). La salida es la misma
+            max_inflight_bytes: Con el motor asyncio, bytes leídos y aún no
+                escritos como máximo (por defecto self.max_inflight_bytes)
             
         Returns:
-            Tupla con (número de archivos procesados, lista de errores)
+            Tupla con (número de archivos procesados, lista de errores).
+            Las estadísticas de la ejecución (p. ej. cuántos archivos decidió
+            cada nivel del detector de codificación) quedan en self.last_stats.
+        """
+        run = self._new_run(
+            source_path, log_path,
+            jobs=jobs,
+            detect_processes=detect_processes,
+            binary_output=binary_output,
+            use_cache=use_cache,
+            incremental=incremental,
+            index=index,
+            output_format=output_format,
+            compression_level=compression_level,
+            threaded_compression=threaded_compression,
+            skip_binary=skip_binary,
+            deduplicate=deduplicate,
+            budget_bytes=budget_bytes,
+            budget_tokens=budget_tokens,
+            budget_policy=budget_policy,
+            shard_size=shard_size,
+            respect_gitignore=respect_gitignore,
+            source_mode=source_mode,
+            engine=engine,
+            max_inflight_bytes=max_inflight_bytes,
+        )
+        self.cancel_event.clear()
+        self.last_stats = run.stats
+        self._execute(run, output_path)
+        return run.processed_files, run.errors
+    
+    def extract_batch(self, targets: Sequence[Tuple[str, str]], workers: Optional[int] = None,
+                      parallel_roots: Optional[int] = None, **options) -> List[BatchResult]:
         """
+        Extrae varias carpetas de origen con un único pool de trabajo compartido.
+        
+        Los archivos de todas las carpetas se leen y decodifican en el mismo
+        pool de hilos, que atiende por turnos a las carpetas en curso, y chardet
+        usa un único pool de procesos si detect_processes > 0. Se escriben a la
+        vez hasta parallel_roots salidas, de modo que mientras una carpeta
+        escanea o escribe, el pool sigue ocupado con las demás. Un error en una
+        carpeta no detiene el resto.
+        
+        El callback de progreso recibe una actualización por carpeta terminada.
+        
+        Args:
+            targets: Pares (carpeta de origen, archivo de salida)
+            workers: Hilos del pool compartido (por defecto self.batch_workers)
+            parallel_roots: Carpetas en curso a la vez (por defecto
+                self.batch_parallel_roots)
+            **options: Opciones de extract_content comunes a todas las
+                carpetas. jobs fija cuántos archivos adelanta cada carpeta (jobs
+                * 4); por defecto se reparten los hilos entre las carpetas en curso
+            
+        Returns:
+            Un BatchResult por carpeta, en el orden de targets. Las
+            estadísticas del lote quedan en self.last_stats
+        """
+        workers = workers or self.batch_workers
+        parallel_roots = max(1, min(parallel_roots or self.batch_parallel_roots, len(targets) or 1))
+        if options.get('jobs') is None:
+            options['jobs'] = max(1, workers // parallel_roots)
+        # Validar las opciones antes de empezar ninguna carpeta
+        runs = [self._new_run(source_path, **options) for source_path, _ in targets]
+        results = [BatchResult(source_path, output_path) for source_path, output_path in targets]
+        
+        self.cancel_event.clear()
+        finished = itertools.count(1)
+        shared_pool = FairExecutor(workers, thread_name_prefix='extractor-batch')
+        detect_pool = None
+        detect_processes = max((run.detect_processes for run in runs), default=0)
+        if detect_processes > 0:
+            from concurrent.futures import ProcessPoolExecutor
+            detect_pool = ProcessPoolExecutor(max_workers=detect_processes)
+        
+        def extract_root(number: int):
+            run, result = runs[number], results[number]
+            run.shared_pool, run.detect_pool = shared_pool, detect_pool
+            try:
+                self._execute(run, result.output_path, report_progress=False)
+            except Exception as e:
+                result.error = str(e)
+            result.processed_files = run.processed_files
+            result.errors = run.errors
+            result.stats = run.stats
+            if self.progress_callback:
+                self.progress_callback(next(finished) * 100 / len(targets),
+                                       f"Completado: {result.source_path}")
+        
+        start = time.perf_counter()
+        try:
+            for _ in iter_ordered(extract_root, range(len(targets)), parallel_roots):
+                pass
+        finally:
+            cancelled = self.cancel_event.is_set()
+            shared_pool.shutdown(wait=True, cancel_futures=True)
+            if detect_pool is not None:
+                detect_pool.shutdown(wait=not cancelled, cancel_futures=True)
+        
+        self.last_stats = {
+            'roots': len(results),
+            'failed_roots': sum(1 for result in results if result.error is not None),
+            'processed_files': sum(result.processed_files for result in results),
+            'errors': sum(len(result.errors) for result in results),
+            'elapsed_seconds': round(time.perf_counter() - start, 3),
+        }
+        if any(result.stats.get('cancelled') for result in results):
+            self.last_stats['cancelled'] = True
+        return results
+    
+    def _new_run(self, source_path: str, log_path: Optional[str] = None,
+                 jobs: Optional[int] = None,
+                 detect_processes: Optional[int] = None,
+                 binary_output: Optional[bool] = None,
+                 use_cache: Optional[bool] = None,
+                 incremental: bool = False,
+                 index: bool = False,
+                 output_format: Optional[str] = None,
+                 compression_level: Optional[int] = None,
+                 threaded_compression: Optional[bool] = None,
+                 skip_binary: Optional[bool] = None,
+                 deduplicate: Optional[bool] = None,
+                 budget_bytes: Optional[int] = None,
+                 budget_tokens: Optional[int] = None,
+                 budget_policy: Optional[str] = None,
+                 shard_size: Optional[int] = None,
+                 respect_gitignore: Optional[bool] = None,
+                 source_mode: Optional[str] = None,
+                 engine: Optional[str] = None,
+                 max_inflight_bytes: Optional[int] = None) -> _Run:
+        """Valida las opciones de extract_content y completa las omitidas con las de la instancia."""
+        output_format = output_format or self.output_format
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Formato de salida no soportado: {output_format}")
+        if output_format != 'text' and (incremental or index):
+            raise ValueError("El modo incremental y el índice requieren la salida de texto sin comprimir")
+        if shard_size is not None:
+            if shard_size <= 0:
+                raise ValueError("El tamaño de cada parte debe ser positivo")
+            if incremental or budget_bytes is not None or budget_tokens is not None:
+                raise ValueError("La salida en partes no admite el modo incremental ni el presupuesto")
+        
+        engine = engine or self.engine
+        if engine not in ENGINES:
+            raise ValueError(f"Motor no soportado: {engine}")
+        if max_inflight_bytes is None:
+            max_inflight_bytes = self.max_inflight_bytes
+        if max_inflight_bytes <= 0:
+            raise ValueError("El máximo de bytes en vuelo debe ser positivo")
+        
+        run = _Run(
+            source_path=source_path,
+            log_path=log_path,
+            jobs=jobs if jobs is not None else self.jobs,
+            detect_processes=detect_processes if detect_processes is not None else self.detect_processes,
+            binary_output=binary_output if binary_output is not None else self.binary_output,
+            engine=engine,
+            max_inflight_bytes=max_inflight_bytes,
+            output_format=output_format,
+            compression_level=compression_level if compression_level is not None else self.compression_level,
+            threaded_compression=(threaded_compression if threaded_compression is not None
+                                  else self.threaded_compression),
+            shard_size=shard_size,
+            respect_gitignore=respect_gitignore,
+            source_mode=source_mode,
+            skip_binary=skip_binary if skip_binary is not None else self.skip_binary,
+            use_cache=use_cache if use_cache is not None else self.use_cache,
+            incremental=incremental,
+            write_index=index,
+            dedup=deduplicate if deduplicate is not None else self.deduplicate,
+            budget=budget_to_bytes(budget_bytes, budget_tokens, BYTES_PER_TOKEN),
+            budget_policy=budget_policy or self.budget_policy,
+            extension_priority=list(self.extension_priority),
+        )
+        if run.budget_policy not in BUDGET_POLICIES:
+            raise ValueError(f"Política de presupuesto no soportada: {run.budget_policy}")
+        return run
+    
+    def _execute(self, run: _Run, output_path: str, report_progress: bool = True):
+        """Escanea la carpeta de origen de una ejecución y escribe su salida."""
+        source_path = run.source_path
         if not os.path.exists(source_path):
             raise FileNotFoundError(f"La carpeta de origen no existe: {source_path}")
         
-        processed_files = 0
-        errors = []
-        self.cancel_flag = False
+        # Escanear una sola vez; el manifiesto sirve para el progreso y la escritura
+        manifest = self.scan(source_path, run.respect_gitignore, run.source_mode)
+        run.total_files = self.count_files(source_path, manifest)
+        if self.progress_callback and report_progress:
+            run.progress = ProgressReporter(
+                self.progress_callback,
+                total_bytes=sum(entry.size or 0 for entry in manifest.allowed_files),
+                total_files=run.total_files,
+                max_rate=PROGRESS_MAX_RATE_HZ,
+            )
+        if run.dedup:
+            sizes = Counter(entry.size for entry in manifest.allowed_files)
+            run.dedup_sizes = {size for size, count in sizes.items() if count > 1}
         
-        # Contar archivos totales para progreso
-        total_files = self.count_files(source_path)
+        newline = '\n' if run.binary_output else os.linesep
+        state_options = {
+            'source_path': os.path.abspath(source_path),
+            'binary_output': run.binary_output,
+            'newline': newline,
+            'skip_binary': run.skip_binary,
+            'dedup': run.dedup,
+        }
+        if run.incremental:
+            run.splices = plan_splices(load_state(output_path, state_options), manifest.allowed_files)
+            if run.dedup:
+                # Sin hash guardado no se sabe si la sección es ahora un duplicado
+                run.splices = {rel_path: splice for rel_path, splice in run.splices.items()
+                               if splice[3] is not None}
         
+        cache = self._open_cache(run, manifest)
         try:
-            with open(output_path, 'w', encoding='utf-8') as output_file:
-                # Escribir encabezado
-                output_file.write(f"=== EXTRACCIÓN DE CÓDIGO ===\n")
-                output_file.write(f"Carpeta origen: {source_path}\n")
-                output_file.write(f"Total de archivos a procesar: {total_files}\n")
-                output_file.write(f"{'='*50}\n\n")
-                
-                current_file = 0
-                
-                for root, dirs, files in os.walk(source_path):
-                    if self.cancel_flag:
-                        break
-                        
-                    # Filtrar carpetas excluidas
-                    dirs[:] = [d for d in dirs if self.is_folder_allowed(os.path.join(root, d))]
-                    
-                    # Escribir información de la carpeta
-                    relative_path = os.path.relpath(root, source_path)
-                    output_file.write(f"--- Carpeta: {relative_path} ---\n")
-                    
-                    # Verificar si la carpeta está vacía
-                    allowed_files = [f for f in files if self.is_file_allowed(os.path.join(root, f))]
-                    if not allowed_files and not dirs:
-                        output_file.write("(Carpeta vacía)\n\n")
-                        continue
-                    
-                    # Procesar archivos
-                    for file in files:
-                        if self.cancel_flag:
-                            break
-                            
-                        file_path = os.path.join(root, file)
-                        
-                        if not self.is_file_allowed(file_path):
-                            continue
-                            
-                        current_file += 1
-                        
-                        # Reportar progreso
-                        if self.progress_callback:
-                            progress = (current_file / total_files) * 100
-                            self.progress_callback(progress, f"Procesando: {file}")
-                        
-                        try:
-                            # Detectar codificación y leer archivo
-                            encoding = self.detect_encoding(file_path)
-                            
-                            with open(file_path, 'r', encoding=encoding, errors='replace') as f:
-                                content = f.read()
-                            
-                            # Escribir contenido al archivo de salida
-                            relative_file_path = os.path.relpath(file_path, source_path)
-                            output_file.write(f"--- Inicio del archivo: {relative_file_path} ---\n")
-                            output_file.write(content)
-                            if not content.endswith('\n'):
-                                output_file.write('\n')
-                            output_file.write(f"--- Fin del archivo: {relative_file_path} ---\n\n")
-                            
-                            processed_files += 1
-                            
-                        except Exception as e:
-                            error_msg = f"Error al procesar {file_path}: {str(e)}"
-                            errors.append(error_msg)
-                            
-                            # Log del error
-                            if log_path:
-                                try:
-                                    with open(log_path, 'a', encoding='utf-8') as log_file:
-                                        log_file.write(f"[ERROR] {error_msg}\n")
-                                except Exception:
-                                    pass  # Si no se puede escribir el log, continuar
-                
-                # Escribir resumen final
-                output_file.write(f"\n{'='*50}\n")
-                output_file.write(f"=== RESUMEN DE EXTRACCIÓN ===\n")
-                output_file.write(f"Archivos procesados exitosamente: {processed_files}\n")
-                output_file.write(f"Errores encontrados: {len(errors)}\n")
-                if self.cancel_flag:
-                    output_file.write("NOTA: Extracción cancelada por el usuario\n")
-                output_file.write(f"{'='*50}\n")
+            if run.shard_size is not None:
+                self._write_shards(output_path, manifest, run, run.shard_size, run.output_format,
+                                   run.compression_level, run.threaded_compression, newline)
+            else:
+                self._write_target(output_path, manifest, run, run.output_format, run.compression_level,
+                                   run.threaded_compression, newline, state_options)
+            
+            if cache is not None:
+                self._store_cache(cache, run)
+            if run.progress is not None:
+                run.progress.finish()
         
         except Exception as e:
             error_msg = f"Error crítico durante la extracción: {str(e)}"
-            errors.append(error_msg)
+            run.errors.append(error_msg)
             raise Exception(error_msg)
+        finally:
+            if cache is not None:
+                cache.close()
+    
+    def _write_target(self, output_path: str, manifest: ScanManifest, run: _Run,
+                      output_format: str, compression_level: int, threaded: bool,
+                      newline: str, state_options: Optional[dict] = None,
+                      publish: bool = True) -> Optional[str]:
+        """
+        Escribe una salida completa para output_path.
+        
+        Se escribe en un archivo temporal junto a la salida que la sustituye
+        de forma atómica al terminar (en modo incremental, además, la salida
+        anterior se lee mientras tanto). Si la extracción se cancela o falla,
+        el temporal se borra y la salida anterior queda intacta.
+        
+        Returns:
+            Con publish=False, la ruta del temporal ya escrito, que el
+            llamador publica con _publish; None si se publicó o se canceló
+        """
+        target_path = f"{output_path}.{os.urandom(4).hex()}.tmp"
+        try:
+            with open_output(target_path, output_format, compression_level, threaded,
+                             name=output_path) as output_file:
+                output = OutputWriter(output_file, newline=newline,
+                                      zero_copy=output_format == 'text')
+                if run.splices:
+                    with open(output_path, 'rb') as previous_output:
+                        run.previous_output = previous_output
+                        self._write_output(output, manifest, run)
+                else:
+                    self._write_output(output, manifest, run)
+            
+            if self.cancel_event.is_set():
+                # Solo aquí se decide que la salida anterior se conserva
+                os.remove(target_path)
+                run.stats['cancelled'] = True
+                return None
+            if not publish:
+                return target_path
+            self._publish(target_path, output_path, run, output, state_options)
+            return None
+        except BaseException:
+            if os.path.exists(target_path):
+                os.remove(target_path)
+            raise
+        finally:
+            run.previous_output = None
+    
+    def _publish(self, target_path: str, output_path: str, run: _Run, encoder: OutputWriter,
+                 state_options: Optional[dict] = None):
+        """Sustituye la salida por el temporal ya escrito y guarda su estado e índice."""
+        os.replace(target_path, output_path)
+        if run.incremental:
+            save_state(output_path, state_options, run.sections)
+        if run.write_index:
+            write_index(output_path, self._index_entries(encoder, run.sections))
+        elif os.path.exists(index_path(output_path)):
+            # El índice de una ejecución anterior ya no corresponde a esta salida
+            os.remove(index_path(output_path))
+    
+    def _write_shards(self, output_path: str, manifest: ScanManifest, run: _Run, shard_size: int,
+                      output_format: str, compression_level: int, threaded: bool, newline: str):
+        """
+        Reparte los archivos en partes de como mucho shard_size bytes
+        (estimados con los tamaños del escaneo) y las escribe en paralelo.
+        
+        Cada parte tiene su propio encabezado y resumen; la deduplicación se
+        aplica dentro de cada parte. Los resultados de todas las partes se
+        acumulan en run.
+        """
+        # Los textos fijos solo dependen de la conversión de saltos de línea
+        measure = OutputWriter(io.BytesIO(), newline=newline)
+        total = run.total_files
+        overhead = (len(measure.encode(self._header_text(run.source_path, total)))
+                    + len(measure.encode(self._summary_text(run, bound=total))))
+        shards = plan_shards(
+            manifest, shard_size, overhead,
+            folder_cost=lambda directory: len(measure.encode(self._folder_text(directory))),
+            file_cost=lambda entry: self._markers_length(measure, entry) + (entry.size or 0),
+        )
+        
+        shard_runs = [
+            replace(run, total_files=shard.total_allowed, cache_updates=[], sections=[],
+                    errors=[], stats={}, first_by_digest={})
+            for shard in shards
+        ]
+        
+        staged = {}  # Número de parte -> temporal ya escrito
+        
+        def write_shard(number: int):
+            target_path = self._write_target(shard_path(output_path, number), shards[number - 1],
+                                             shard_runs[number - 1], output_format, compression_level,
+                                             threaded, newline, publish=False)
+            if target_path is not None:
+                staged[number] = target_path
+        
+        shard_writes = iter_ordered(write_shard, range(1, len(shards) + 1),
+                                    min(self.shard_workers, len(shards)))
+        try:
+            # Consumir el iterador para que los errores de cualquier parte se propaguen
+            for _ in shard_writes:
+                pass
+            if self.cancel_event.is_set():
+                run.stats['cancelled'] = True
+                return
+            # Las partes se publican solo cuando todas están escritas
+            for number in range(1, len(shards) + 1):
+                self._publish(staged.pop(number), shard_path(output_path, number),
+                              shard_runs[number - 1], measure)
+            # Las partes sobrantes de una ejecución anterior con más partes ya no
+            # pertenecen a la salida
+            for stale_path in stale_shards(output_path, len(shards)):
+                for path in (stale_path, index_path(stale_path)):
+                    if os.path.exists(path):
+                        os.remove(path)
+        finally:
+            shard_writes.close()
+            for target_path in staged.values():
+                os.remove(target_path)
+        
+        listing = []
+        for number, (shard, shard_run) in enumerate(zip(shards, shard_runs), start=1):
+            run.processed_files += shard_run.processed_files
+            run.binary_files += shard_run.binary_files
+            run.duplicate_files += shard_run.duplicate_files
+            run.errors.extend(shard_run.errors)
+            run.cache_updates.extend(shard_run.cache_updates)
+            for key, value in shard_run.stats.items():
+                if key == 'encoding_tiers':
+                    tiers = run.stats.setdefault(key, {})
+                    for tier, count in value.items():
+                        tiers[tier] = tiers.get(tier, 0) + count
+                elif isinstance(value, int):
+                    run.stats[key] = run.stats.get(key, 0) + value
+            files = shard.allowed_files
+            listing.append({
+                'path': os.path.basename(shard_path(output_path, number)),
+                'files': len(files),
+                'bytes': os.path.getsize(shard_path(output_path, number)),
+                'first_file': files[0].rel_path if files else None,
+                'last_file': files[-1].rel_path if files else None,
+                'processed': shard_run.processed_files,
+                'errors': len(shard_run.errors),
+            })
         
-        return processed_files, errors
+        write_shards_manifest(output_path, run.source_path, listing)
+        run.stats['shards'] = [item['path'] for item in listing]
     
-    def get_summary(self, source_path: str) -> dict:
+    def _index_entries(self, output: OutputWriter, sections: List[Section]) -> List[IndexEntry]:
+        """Calcula la posición del contenido de cada sección, sin sus marcadores."""
+        entries = []
+        by_path = {}
+        for section in sections:
+            rel_path = section.entry.rel_path
+            if section.duplicate_of is not None:
+                # Un duplicado apunta al contenido del primer archivo idéntico
+                entries.append(by_path[section.duplicate_of]._replace(rel_path=rel_path))
+                continue
+            header = len(output.encode(f"--- Inicio del archivo: {rel_path} ---\n"))
+            footer = len(output.encode(f"--- Fin del archivo: {rel_path} ---\n\n"))
+            by_path[rel_path] = IndexEntry(rel_path, section.offset + header,
+                                           section.length - header - footer,
+                                           section.encoding, section.digest)
+            entries.append(by_path[rel_path])
+        return entries
+    
+    def _open_cache(self, run: _Run, manifest: ScanManifest) -> Optional[EncodingCache]:
+        """
+        Abre la caché persistente y carga las entradas vigentes del manifiesto.
+        
+        Si la caché no puede abrirse, la extracción continúa sin ella.
+        """
+        if not run.use_cache:
+            return None
+        try:
+            cache = EncodingCache(self.cache_path, CACHE_MAX_ENTRIES)
+            run.cached = cache.lookup_many(manifest.allowed_files)
+            if not run.skip_binary:
+                # Los registros de archivos binarios no guardan codificación
+                run.cached = {path: record for path, record in run.cached.items()
+                              if not record.is_binary}
+        except Exception as e:
+            _log_warning("No se pudo usar la caché %s: %s", self.cache_path, e)
+            run.use_cache = False
+            return None
+        
+        run.stats['cache_hits'] = len(run.cached)
+        run.stats['cache_misses'] = run.total_files - len(run.cached)
+        return cache
+    
+    def _store_cache(self, cache: EncodingCache, run: _Run):
+        """
+        Guarda en la caché persistente lo detectado en esta ejecución.
+        
+        La salida ya está publicada: si la caché no puede escribirse (p. ej.
+        bloqueada o de solo lectura), la extracción no falla por ello.
+        """
+        try:
+            cache.store_many(run.cache_updates)
+        except Exception as e:
+            _log_warning("No se pudo actualizar la caché %s: %s", self.cache_path, e)
+    
+    def get_summary(self, source_path: str, manifest: Optional[ScanManifest] = None) -> dict:
         """
         Obtiene un resumen de la carpeta a procesar.
         
+        Las carpetas excluidas se cuentan pero no se recorren, igual que en la
+        extracción.
+        
         Args:
             source_path: Carpeta de origen
+            manifest: Manifiesto ya escaneado (opcional, evita recorrer de nuevo)
             
         Returns:
             Diccionario con estadísticas del contenido
@@ -242,6 +1561,9 @@ class FileExtractor:
         if not os.path.exists(source_path):
             return {}
         
+        if manifest is None:
+            manifest = self.scan(source_path)
+        
         summary = {
             'total_folders': 0,
             'total_files': 0,
@@ -253,31 +1575,73 @@ class FileExtractor:
             'largest_size': 0
         }
         
-        for root, dirs, files in os.walk(source_path):
-            summary['total_folders'] += len(dirs)
-            summary['total_files'] += len(files)
+        for directory in manifest.directories:
+            summary['total_folders'] += directory.folder_count
+            summary['total_files'] += len(directory.files)
             
-            for file in files:
-                file_path = os.path.join(root, file)
-                
-                try:
-                    file_size = os.path.getsize(file_path)
-                    summary['total_size'] += file_size
-                    
-                    if file_size > summary['largest_size']:
-                        summary['largest_size'] = file_size
-                        summary['largest_file'] = os.path.relpath(file_path, source_path)
-                    
-                    _, ext = os.path.splitext(file)
-                    ext = ext.lower()
-                    summary['extensions'][ext] = summary['extensions'].get(ext, 0) + 1
-                    
-                    if self.is_file_allowed(file_path):
-                        summary['allowed_files'] += 1
-                    else:
-                        summary['excluded_files'] += 1
-                        
-                except OSError:
+            for entry in directory.files:
+                if entry.size is None:
                     continue
+                
+                summary['total_size'] += entry.size
+                
+                if entry.size > summary['largest_size']:
+                    summary['largest_size'] = entry.size
+                    summary['largest_file'] = entry.rel_path
+                
+                summary['extensions'][entry.extension] = summary['extensions'].get(entry.extension, 0) + 1
+                
+                if entry.allowed:
+                    summary['allowed_files'] += 1
+                else:
+                    summary['excluded_files'] += 1
         
         return summary
+
+
+def _is_valid_utf8(data: bytes) -> bool:
+    """Comprueba que un buffer completo sea UTF-8 válido."""
+    try:
+        data.decode('utf-8')
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _is_valid_utf8_stream(handle: BinaryIO, cancel: Optional[threading.Event] = None) -> bool:
+    """Comprueba por bloques que un archivo abierto sea UTF-8 válido y vuelve al inicio."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for chunk in iter(lambda: handle.read(STREAM_CHUNK_SIZE), b''):
+            if cancel is not None and cancel.is_set():
+                raise _Cancelled()
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    finally:
+        handle.seek(0)
+    return True
+
+
+def _log_warning(message: str, *args):
+    """Registra un aviso; logging solo se importa si hay algo que avisar, no al arrancar."""
+    import logging
+    logging.getLogger(__name__).warning(message, *args)
+
+
+def _content_digest(data: Optional[bytes], handle: Optional[BinaryIO],
+                    cancel: Optional[threading.Event] = None) -> str:
+    """Hash del contenido original de un archivo, en memoria o abierto."""
+    import hashlib  # Solo si se necesita el hash, no al arrancar
+
+    digest = hashlib.blake2b(digest_size=16)
+    if data is not None:
+        digest.update(data)
+    else:
+        for chunk in iter(lambda: handle.read(STREAM_CHUNK_SIZE), b''):
+            if cancel is not None and cancel.is_set():
+                raise _Cancelled()
+            digest.update(chunk)
+        handle.seek(0)
+    return digest.hexdigest()
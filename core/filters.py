@@ -0,0 +1,160 @@
+"""
+Motor de filtros de inclusión/exclusión.
+
+Compila una sola vez por ejecución las listas de configuración en frozensets
+y los patrones glob del usuario en una única expresión regular combinada, de
+modo que cada decisión cuesta lo mismo aunque las listas crezcan.
+"""
+
+import os
+import re
+from typing import Iterable, List, Optional, Pattern
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Traduce un patrón glob a una expresión regular (sin anclas).
+
+    Soporta '*' y '?' (que no cruzan '/'), clases '[...]', escapes con '\\'
+    y '**' para cualquier número de carpetas: '**/x', 'a/**/x' y 'a/**'.
+
+    Args:
+        pattern: Patrón glob con '/' como separador
+
+    Returns:
+        Expresión regular equivalente
+    """
+    regex = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                at_start = i == 0 or pattern[i - 1] == '/'
+                i += 2
+                if at_start and pattern.startswith('/', i):
+                    # '**/' : cero o más carpetas
+                    regex.append('(?:.*/)?')
+                    i += 1
+                elif at_start and i == n:
+                    # '/**' al final: todo lo que haya dentro
+                    if regex and regex[-1] == '/':
+                        regex[-1] = '(?:/.*)?'
+                    else:
+                        regex.append('.*')
+                else:
+                    regex.append('.*')
+                continue
+            regex.append('[^/]*')
+        elif c == '?':
+            regex.append('[^/]')
+        elif c == '\\' and i + 1 < n:
+            # Carácter escapado: se compara literalmente
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                regex.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j].replace('\\', '\\\\')
+                if body[:1] in ('!', '^'):
+                    body = '^' + body[1:]
+                regex.append(f'[{body}]')
+                i = j
+        else:
+            regex.append(re.escape(c))
+        i += 1
+    return ''.join(regex)
+
+
+def _combine(patterns: List[str]) -> Optional[Pattern]:
+    """Combina varias expresiones en una sola, o None si no hay ninguna."""
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{p})' for p in patterns), re.DOTALL)
+
+
+class FilterEngine:
+    """
+    Decide qué archivos y carpetas se procesan.
+
+    Los patrones sin '/' se comparan con el nombre del archivo o carpeta (por
+    ejemplo '*.min.js'); los que contienen '/' se comparan con la ruta
+    relativa a la carpeta de origen (por ejemplo 'tests/fixtures/**').
+    """
+
+    def __init__(self, excluded_files: Iterable[str], excluded_folders: Iterable[str],
+                 allowed_extensions: Iterable[str], excluded_patterns: Iterable[str] = (),
+                 max_file_size: Optional[int] = None):
+        self.excluded_files = frozenset(excluded_files)
+        self.excluded_folders = frozenset(excluded_folders)
+        self.allowed_extensions = frozenset(ext.lower() for ext in allowed_extensions)
+        self.max_file_size = max_file_size
+
+        name_patterns = []
+        path_patterns = []
+        for pattern in excluded_patterns:
+            pattern = pattern.strip().replace('\\', '/')
+            if not pattern:
+                continue
+            if '/' in pattern.rstrip('/'):
+                path_patterns.append(glob_to_regex(pattern.strip('/')))
+            else:
+                name_patterns.append(glob_to_regex(pattern.rstrip('/')))
+        self._name_regex = _combine(name_patterns)
+        self._path_regex = _combine(path_patterns)
+
+    def is_file_allowed(self, rel_path: str, name: str, size: Optional[int]) -> bool:
+        """
+        Verifica si un archivo debe ser procesado.
+
+        Args:
+            rel_path: Ruta relativa a la carpeta de origen
+            name: Nombre del archivo
+            size: Tamaño en bytes (None si no se pudo obtener)
+
+        Returns:
+            True si el archivo debe ser procesado
+        """
+        if name in self.excluded_files:
+            return False
+
+        _, ext = os.path.splitext(name)
+        if ext.lower() not in self.allowed_extensions:
+            return False
+
+        if size is None or (self.max_file_size is not None and size > self.max_file_size):
+            return False
+
+        return not self._matches_patterns(rel_path, name)
+
+    def is_folder_allowed(self, rel_path: str, name: str) -> bool:
+        """
+        Verifica si una carpeta debe recorrerse.
+
+        Args:
+            rel_path: Ruta relativa a la carpeta de origen
+            name: Nombre de la carpeta
+
+        Returns:
+            True si la carpeta debe recorrerse
+        """
+        if name in self.excluded_folders:
+            return False
+        return not self._matches_patterns(rel_path, name)
+
+    def _matches_patterns(self, rel_path: str, name: str) -> bool:
+        if self._name_regex is not None and self._name_regex.fullmatch(name):
+            return True
+        if self._path_regex is not None:
+            if os.sep != '/':
+                rel_path = rel_path.replace(os.sep, '/')
+            return self._path_regex.fullmatch(rel_path) is not None
+        return False
@@ -0,0 +1,200 @@
+"""
+Lectura directa del índice de git (.git/index).
+
+En un checkout de git, la lista de archivos versionados ya está en el índice.
+Leerlo evita recorrer el árbol de trabajo (y las carpetas no versionadas, como
+node_modules o los entornos virtuales) sin necesitar el binario de git.
+
+Formato: https://git-scm.com/docs/index-format (versiones 2, 3 y 4).
+"""
+
+import os
+import struct
+from typing import List, NamedTuple, Optional
+
+from core.gitignore import find_git_dir
+
+_HEADER = struct.Struct('>4sII')
+# ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size
+_STAT = struct.Struct('>10I')
+
+_MODE_TYPE_MASK = 0o170000
+_MODE_GITLINK = 0o160000  # Submódulo
+_MODE_DIRECTORY = 0o040000  # Carpeta dispersa (sparse index)
+
+_FLAG_EXTENDED = 0x4000
+_FLAG_STAGE_MASK = 0x3000
+_FLAG_NAME_MASK = 0x0FFF
+_EXT_FLAG_SKIP_WORKTREE = 0x4000
+
+
+class GitIndexError(ValueError):
+    """El índice no existe o tiene un formato que no se puede leer."""
+
+
+class GitIndexEntry(NamedTuple):
+    """Archivo versionado según el índice."""
+    path: str  # Ruta desde la raíz del repositorio, con '/' como separador
+    mode: int
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+def _hash_size(git_dir: str) -> int:
+    """Bytes del identificador de objeto: 20 (SHA-1) o 32 (SHA-256)."""
+    try:
+        with open(os.path.join(git_dir, 'config'), 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                key, _, value = line.partition('=')
+                if key.strip().lower() == 'objectformat' and value.strip().lower() == 'sha256':
+                    return 32
+    except OSError:
+        pass
+    return 20
+
+
+def _read_varint(data: bytes, pos: int) -> tuple:
+    """Lee un entero con la codificación de longitud variable de git (índice v4)."""
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def read_git_index(index_file: str, hash_size: int = 20) -> List[GitIndexEntry]:
+    """
+    Lee las entradas de un archivo de índice de git.
+
+    Se omiten los submódulos, las carpetas de un índice disperso, las entradas
+    marcadas como skip-worktree y las etapas de conflicto repetidas.
+
+    Args:
+        index_file: Ruta del archivo de índice
+        hash_size: Bytes del identificador de objeto
+
+    Returns:
+        Entradas del índice, en el orden del índice
+
+    Raises:
+        GitIndexError: Si el índice no se puede leer o usa un formato no
+            soportado (por ejemplo, un índice dividido)
+    """
+    try:
+        with open(index_file, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        raise GitIndexError(f"No se pudo leer el índice: {e}") from e
+
+    if len(data) < _HEADER.size:
+        raise GitIndexError("Índice truncado")
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b'DIRC':
+        raise GitIndexError("Firma de índice no válida")
+    if version not in (2, 3, 4):
+        raise GitIndexError(f"Versión de índice no soportada: {version}")
+
+    entries = []
+    pos = _HEADER.size
+    previous_name = b''
+    try:
+        for _ in range(count):
+            start = pos
+            (_, _, mtime_s, mtime_ns, _, inode, mode, _, _, size) = _STAT.unpack_from(data, pos)
+            pos += _STAT.size + hash_size
+            (flags,) = struct.unpack_from('>H', data, pos)
+            pos += 2
+            extended_flags = 0
+            if flags & _FLAG_EXTENDED and version >= 3:
+                (extended_flags,) = struct.unpack_from('>H', data, pos)
+                pos += 2
+
+            if version == 4:
+                strip, pos = _read_varint(data, pos)
+                end = data.index(b'\0', pos)
+                name = previous_name[:len(previous_name) - strip] + data[pos:end]
+                pos = end + 1
+            else:
+                name_length = flags & _FLAG_NAME_MASK
+                if name_length < _FLAG_NAME_MASK:
+                    end = pos + name_length
+                else:
+                    end = data.index(b'\0', pos)
+                name = data[pos:end]
+                # Relleno con NUL hasta un múltiplo de 8 bytes (al menos uno)
+                entry_length = (end - start) + 1
+                pos = start + ((entry_length + 7) // 8) * 8
+            previous_name = name
+
+            if pos > len(data):
+                raise GitIndexError("Índice truncado")
+
+            mode_type = mode & _MODE_TYPE_MASK
+            if mode_type in (_MODE_GITLINK, _MODE_DIRECTORY):
+                continue
+            if extended_flags & _EXT_FLAG_SKIP_WORKTREE:
+                continue
+            path = name.decode('utf-8', 'surrogateescape')
+            if flags & _FLAG_STAGE_MASK and entries and entries[-1].path == path:
+                # Conflicto de fusión: una sola entrada por archivo
+                continue
+
+            entries.append(GitIndexEntry(
+                path=path,
+                mode=mode,
+                size=size,
+                mtime_ns=mtime_s * 1_000_000_000 + mtime_ns,
+                inode=inode,
+            ))
+
+        # Extensiones: un índice dividido guarda parte de las entradas en otro archivo
+        end_of_extensions = len(data) - hash_size
+        while pos + 8 <= end_of_extensions:
+            ext_signature, ext_size = struct.unpack_from('>4sI', data, pos)
+            if ext_signature == b'link':
+                raise GitIndexError("Índice dividido (split index) no soportado")
+            pos += 8 + ext_size
+    except (struct.error, ValueError, IndexError) as e:
+        if isinstance(e, GitIndexError):
+            raise
+        raise GitIndexError(f"Índice corrupto: {e}") from e
+
+    return entries
+
+
+def tracked_files(source_path: str) -> Optional[List[str]]:
+    """
+    Lista los archivos versionados dentro de una carpeta.
+
+    Args:
+        source_path: Carpeta de origen (la raíz del repositorio o una subcarpeta)
+
+    Returns:
+        Rutas relativas a source_path (con el separador del sistema) en el
+        orden del índice, o None si la carpeta no está en un repositorio git
+
+    Raises:
+        GitIndexError: Si hay repositorio pero su índice no se puede leer
+    """
+    repo = find_git_dir(source_path)
+    if repo is None:
+        return None
+    root, git_dir = repo
+
+    prefix = os.path.relpath(os.path.abspath(source_path), root)
+    if prefix == os.curdir:
+        prefix = ''
+    else:
+        prefix = prefix.replace(os.sep, '/') + '/'
+
+    paths = []
+    for entry in read_git_index(os.path.join(git_dir, 'index'), _hash_size(git_dir)):
+        if not entry.path.startswith(prefix):
+            continue
+        rel_path = entry.path[len(prefix):]
+        paths.append(rel_path if os.sep == '/' else rel_path.replace('/', os.sep))
+    return paths
@@ -0,0 +1,254 @@
+"""
+Soporte de .gitignore durante el escaneo.
+
+Las reglas de cada archivo de patrones (.git/info/exclude y cada .gitignore
+encontrado) se compilan una vez. Igual que en git, gana la última regla que
+coincide, los .gitignore más profundos tienen prioridad sobre los de sus
+carpetas padre y una carpeta ignorada no se recorre.
+"""
+
+import os
+import re
+from typing import List, Optional, Pattern, Tuple
+
+from core.filters import glob_to_regex
+
+GITIGNORE_FILENAME = '.gitignore'
+
+
+def find_git_dir(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Busca el repositorio git que contiene una carpeta.
+
+    Admite tanto una carpeta .git como un archivo .git con una línea
+    'gitdir: <ruta>' (worktrees y submódulos).
+
+    Args:
+        path: Carpeta desde la que buscar hacia arriba
+
+    Returns:
+        Tupla (raíz del árbol de trabajo, carpeta git) o None si no hay repositorio
+    """
+    current = os.path.abspath(path)
+    while True:
+        dot_git = os.path.join(current, '.git')
+        if os.path.isdir(dot_git):
+            return current, dot_git
+        if os.path.isfile(dot_git):
+            try:
+                with open(dot_git, 'r', encoding='utf-8') as f:
+                    line = f.readline().strip()
+            except (OSError, UnicodeDecodeError):
+                return None
+            if line.startswith('gitdir:'):
+                git_dir = os.path.join(current, line[len('gitdir:'):].strip())
+                if os.path.isdir(git_dir):
+                    return current, os.path.normpath(git_dir)
+            return None
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+class _Rule:
+    """Una línea de un archivo de patrones ya compilada."""
+    __slots__ = ('regex', 'negate', 'dir_only', 'anchored')
+
+    def __init__(self, regex: Pattern, negate: bool, dir_only: bool, anchored: bool):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+        self.anchored = anchored
+
+
+def _parse_line(line: str) -> Optional[Tuple[str, bool, bool, bool]]:
+    """Devuelve (expresión, negación, solo carpetas, anclado) o None si la línea no es un patrón."""
+    line = line.rstrip('\n').rstrip('\r')
+    if not line or line.startswith('#'):
+        return None
+
+    # Los espacios finales se ignoran salvo que estén escapados
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    anchored = '/' in line
+    line = line.lstrip('/')
+    if line.endswith('/**'):
+        # 'a/**' coincide con todo lo que hay dentro de a, pero no con a
+        regex = glob_to_regex(line[:-3]) + '/.*'
+    else:
+        regex = glob_to_regex(line)
+    return regex, negate, dir_only, anchored
+
+
+class _RuleSet:
+    """Reglas de un archivo de patrones, relativas a la carpeta que lo contiene."""
+
+    def __init__(self, base: str, lines: List[str]):
+        self.base = base  # Ruta desde la raíz del repositorio ('' para la raíz)
+        self.rules: List[_Rule] = []
+        name_patterns = []
+        path_patterns = []
+        for line in lines:
+            parsed = _parse_line(line)
+            if parsed is None:
+                continue
+            regex, negate, dir_only, anchored = parsed
+            self.rules.append(_Rule(re.compile(regex, re.DOTALL), negate, dir_only, anchored))
+            (path_patterns if anchored else name_patterns).append(regex)
+
+        # Expresiones combinadas: descartan de una vez las rutas que no coinciden con ninguna regla
+        self._any_name = re.compile('|'.join(f'(?:{p})' for p in name_patterns), re.DOTALL) if name_patterns else None
+        self._any_path = re.compile('|'.join(f'(?:{p})' for p in path_patterns), re.DOTALL) if path_patterns else None
+
+    def match(self, path: str, name: str, is_dir: bool) -> Optional[bool]:
+        """
+        Aplica las reglas a una ruta.
+
+        Args:
+            path: Ruta desde la raíz del repositorio, con '/' como separador
+            name: Último componente de la ruta
+            is_dir: Si la ruta es una carpeta
+
+        Returns:
+            True si se ignora, False si una negación la vuelve a incluir y
+            None si ninguna regla coincide
+        """
+        if self.base:
+            if not path.startswith(self.base + '/'):
+                return None
+            rel = path[len(self.base) + 1:]
+        else:
+            rel = path
+
+        if not ((self._any_name is not None and self._any_name.fullmatch(name))
+                or (self._any_path is not None and self._any_path.fullmatch(rel))):
+            return None
+
+        for rule in reversed(self.rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.fullmatch(rel if rule.anchored else name):
+                return not rule.negate
+        return None
+
+
+def _read_patterns(path: str) -> Optional[List[str]]:
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.readlines()
+    except OSError:
+        return None
+
+
+class GitignoreMatcher:
+    """
+    Reglas de .gitignore vigentes en una carpeta.
+
+    Es inmutable: enter() devuelve un nuevo matcher con las reglas de la
+    subcarpeta añadidas, de modo que cada rama del recorrido conserva las suyas.
+    """
+
+    def __init__(self, rule_sets: Tuple[_RuleSet, ...], prefix: str):
+        self._rule_sets = rule_sets
+        self._prefix = prefix  # Ruta de la carpeta de origen desde la raíz del repositorio
+
+    @classmethod
+    def for_source(cls, source_path: str) -> 'GitignoreMatcher':
+        """
+        Crea el matcher de una carpeta de origen.
+
+        Si está dentro de un repositorio git se cargan .git/info/exclude y los
+        .gitignore de las carpetas entre la raíz del repositorio y la de origen.
+        El .gitignore de la propia carpeta de origen se carga al recorrerla.
+
+        Args:
+            source_path: Carpeta de origen
+
+        Returns:
+            Matcher para la raíz del escaneo
+        """
+        source = os.path.abspath(source_path)
+        repo = find_git_dir(source)
+        if repo is None:
+            return cls((), '')
+
+        root, git_dir = repo
+        rule_sets = []
+        lines = _read_patterns(os.path.join(git_dir, 'info', 'exclude'))
+        if lines:
+            rule_sets.append(_RuleSet('', lines))
+
+        prefix = os.path.relpath(source, root)
+        if prefix == os.curdir:
+            prefix = ''
+        prefix = prefix.replace(os.sep, '/')
+
+        parts = prefix.split('/') if prefix else []
+        for depth in range(len(parts)):
+            base = '/'.join(parts[:depth])
+            lines = _read_patterns(os.path.join(root, base, GITIGNORE_FILENAME))
+            if lines:
+                rule_sets.append(_RuleSet(base, lines))
+        return cls(tuple(rule_sets), prefix)
+
+    def enter(self, dir_path: str, rel_dir: str) -> 'GitignoreMatcher':
+        """
+        Añade las reglas del .gitignore de una carpeta, si existe.
+
+        Args:
+            dir_path: Ruta de la carpeta
+            rel_dir: Ruta relativa a la carpeta de origen
+
+        Returns:
+            Matcher con las reglas de la carpeta (self si no tiene .gitignore)
+        """
+        lines = _read_patterns(os.path.join(dir_path, GITIGNORE_FILENAME))
+        if not lines:
+            return self
+        rule_set = _RuleSet(self._full_path(rel_dir) if rel_dir != os.curdir else self._prefix, lines)
+        if not rule_set.rules:
+            return self
+        return GitignoreMatcher(self._rule_sets + (rule_set,), self._prefix)
+
+    def is_ignored(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        """
+        Indica si una ruta está ignorada.
+
+        Args:
+            rel_path: Ruta relativa a la carpeta de origen
+            name: Nombre del archivo o carpeta
+            is_dir: Si la ruta es una carpeta
+
+        Returns:
+            True si la ruta está ignorada
+        """
+        if is_dir and name == '.git':
+            return True
+        if not self._rule_sets:
+            return False
+        path = self._full_path(rel_path)
+        for rule_set in reversed(self._rule_sets):
+            result = rule_set.match(path, name, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def _full_path(self, rel_path: str) -> str:
+        if os.sep != '/':
+            rel_path = rel_path.replace(os.sep, '/')
+        return f'{self._prefix}/{rel_path}' if self._prefix else rel_path
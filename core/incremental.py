@@ -0,0 +1,107 @@
+"""
+Estado de la extracción incremental.
+
+Junto a la salida se guarda un manifiesto con los datos de cada archivo y la
+posición de su sección en la salida. En la siguiente ejecución, las secciones
+de los archivos que no han cambiado se copian byte a byte de la salida
+anterior en lugar de volver a leerlos y decodificarlos.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from core.output import Section
+from core.scanner import FileEntry
+
+STATE_VERSION = 2
+STATE_SUFFIX = '.manifest.json'
+
+
+def state_path(output_path: str) -> str:
+    """Ruta del manifiesto de estado asociado a un archivo de salida."""
+    return output_path + STATE_SUFFIX
+
+
+def load_state(output_path: str, options: dict) -> Optional[dict]:
+    """
+    Carga el estado de la ejecución anterior si sigue siendo utilizable.
+
+    El estado se descarta si no existe, si se generó con otras opciones o si
+    la salida anterior ha cambiado desde entonces.
+
+    Args:
+        output_path: Archivo de salida
+        options: Opciones que afectan al contenido de las secciones
+
+    Returns:
+        El estado guardado o None
+    """
+    import json  # Solo si se usa el modo incremental, no al arrancar
+
+    try:
+        with open(state_path(output_path), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        st = os.stat(output_path)
+    except (OSError, ValueError):
+        return None
+
+    if (state.get('version') != STATE_VERSION
+            or state.get('options') != options
+            or state.get('output_size') != st.st_size
+            or state.get('output_mtime_ns') != st.st_mtime_ns):
+        return None
+    return state
+
+
+def plan_splices(state: Optional[dict], entries: List[FileEntry]) -> Dict[str, tuple]:
+    """
+    Decide qué secciones pueden copiarse de la salida anterior.
+
+    Args:
+        state: Estado de la ejecución anterior (o None)
+        entries: Archivos a extraer en esta ejecución
+
+    Returns:
+        Diccionario ruta relativa -> (offset, longitud, codificación, hash) de
+        la sección en la salida anterior
+    """
+    if not state:
+        return {}
+    previous = state['files']
+    splices = {}
+    for entry in entries:
+        record = previous.get(entry.rel_path)
+        if record and record[:3] == [entry.size, entry.mtime_ns, entry.inode]:
+            splices[entry.rel_path] = tuple(record[3:7])
+    return splices
+
+
+def save_state(output_path: str, options: dict, sections: List[Section]):
+    """
+    Guarda el estado de la ejecución que acaba de escribir output_path.
+
+    Args:
+        output_path: Archivo de salida ya escrito
+        options: Opciones que afectan al contenido de las secciones
+        sections: Secciones escritas en la salida
+    """
+    st = os.stat(output_path)
+    import json
+
+    state = {
+        'version': STATE_VERSION,
+        'options': options,
+        'output_size': st.st_size,
+        'output_mtime_ns': st.st_mtime_ns,
+        'files': {
+            section.entry.rel_path: [section.entry.size, section.entry.mtime_ns, section.entry.inode,
+                                     section.offset, section.length, section.encoding, section.digest]
+            for section in sections
+            # Las referencias a duplicados dependen de otros archivos: no se reutilizan
+            if section.duplicate_of is None
+        },
+    }
+    tmp_path = state_path(output_path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, state_path(output_path))
@@ -0,0 +1,127 @@
+"""
+Índice auxiliar de la salida consolidada.
+
+Para cada sección de archivo guarda la ruta relativa, la posición y longitud en
+bytes de su contenido, la codificación original y el hash del contenido. Con
+SectionIndex se puede obtener cualquier sección con un único acceso a un mmap
+de la salida, sin recorrerla buscando los marcadores.
+
+El índice guarda el tamaño y la fecha de modificación de la salida: si otra
+ejecución la reescribe, SectionIndex lo detecta en lugar de devolver bytes de
+otra sección.
+"""
+
+import os
+from typing import Iterator, List, NamedTuple, Optional
+
+INDEX_VERSION = 2
+INDEX_SUFFIX = '.idx'
+
+
+class StaleIndexError(ValueError):
+    """El índice no corresponde a la salida actual (se reescribió después)."""
+
+
+class IndexEntry(NamedTuple):
+    """Sección de un archivo dentro de la salida."""
+    rel_path: str
+    offset: int  # Primer byte del contenido (tras el marcador de inicio)
+    # Bytes del contenido tal como está en la salida (hasta el marcador de fin):
+    # en UTF-8 y con el salto de línea final que se añade si el archivo no lo tiene
+    length: int
+    encoding: Optional[str]  # Codificación del archivo original
+    digest: Optional[str]  # Hash del archivo original, no de la sección
+
+
+def index_path(output_path: str) -> str:
+    """Ruta del índice asociado a un archivo de salida."""
+    return output_path + INDEX_SUFFIX
+
+
+def write_index(output_path: str, entries: List[IndexEntry]):
+    """
+    Escribe el índice de output_path.
+
+    Args:
+        output_path: Archivo de salida ya escrito (y ya en su ruta final)
+        entries: Secciones de la salida, en orden
+    """
+    import json  # Solo al escribir, no al arrancar
+
+    stat = os.stat(output_path)
+    data = {
+        'version': INDEX_VERSION,
+        'output': os.path.basename(output_path),
+        'output_size': stat.st_size,
+        'output_mtime_ns': stat.st_mtime_ns,
+        'sections': [list(entry) for entry in entries],
+    }
+    tmp_path = index_path(output_path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, index_path(output_path))
+
+
+class SectionIndex:
+    """
+    Lector de secciones de una salida consolidada a partir de su índice.
+
+    Lanza StaleIndexError si la salida cambió después de escribir el índice.
+
+    Ejemplo:
+        with SectionIndex('codigo_extraido.txt') as index:
+            codigo = index.get('core/file_extractor.py')
+    """
+
+    def __init__(self, output_path: str, idx_path: Optional[str] = None):
+        # Se importan al usarse, para no cargarlos al arrancar
+        import json
+        import mmap
+
+        with open(idx_path or index_path(output_path), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"Versión de índice no soportada: {data.get('version')}")
+
+        self._entries = {row[0]: IndexEntry(*row) for row in data['sections']}
+        self._file = open(output_path, 'rb')
+        try:
+            stat = os.fstat(self._file.fileno())
+            if (stat.st_size, stat.st_mtime_ns) != (data['output_size'], data['output_mtime_ns']):
+                raise StaleIndexError(f"El índice no corresponde a la salida actual: {output_path}")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __contains__(self, rel_path: str) -> bool:
+        return rel_path in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        return iter(self._entries.values())
+
+    def entry(self, rel_path: str) -> IndexEntry:
+        """Devuelve la entrada del índice de un archivo (KeyError si no está)."""
+        return self._entries[rel_path]
+
+    def get_bytes(self, rel_path: str) -> bytes:
+        """Devuelve el contenido de una sección tal como está en la salida."""
+        entry = self._entries[rel_path]
+        return self._map[entry.offset:entry.offset + entry.length]
+
+    def get(self, rel_path: str) -> str:
+        """Devuelve el contenido de una sección como texto."""
+        return self.get_bytes(rel_path).decode('utf-8', errors='replace')
+
+    def close(self):
+        self._map.close()
+        self._file.close()
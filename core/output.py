@@ -0,0 +1,258 @@
+"""
+Escritura del archivo de salida consolidado.
+"""
+
+import io
+import os
+import threading
+from typing import BinaryIO, NamedTuple, Optional
+
+from core.scanner import FileEntry
+
+COPY_CHUNK_SIZE = 1024 * 1024  # Bloque de la copia de respaldo sin soporte del núcleo
+KERNEL_COPY_CHUNK_SIZE = 16 * 1024 * 1024  # Bytes por llamada al núcleo, entre comprobaciones de cancelación
+
+# Formatos de salida: texto plano o comprimido al vuelo con la biblioteca estándar
+OUTPUT_FORMATS = ('text', 'gzip', 'xz', 'bz2')
+
+
+class Section(NamedTuple):
+    """Sección de un archivo ya escrita en la salida."""
+    entry: FileEntry
+    offset: int  # Posición del marcador de inicio
+    length: int  # Bytes desde el marcador de inicio hasta el final de la sección
+    encoding: Optional[str]
+    digest: Optional[str]
+    duplicate_of: Optional[str] = None  # Sección de referencia a un archivo idéntico anterior
+
+
+class OutputWriter:
+    """
+    Escribe la salida sobre un archivo binario llevando la cuenta de los bytes
+    escritos.
+
+    En modo texto convierte cada '\\n' en os.linesep, igual que un archivo
+    abierto con open(..., 'w'), de modo que la salida es idéntica byte a byte.
+    """
+
+    def __init__(self, raw: BinaryIO, newline: str = os.linesep, zero_copy: bool = True):
+        self._raw = raw
+        self._newline = newline.encode('ascii') if newline != '\n' else None
+        self._zero_copy = zero_copy  # Solo si raw escribe directamente en su descriptor
+        self.offset = 0  # Bytes escritos hasta ahora
+
+    def write(self, text: str):
+        """Codifica el texto en UTF-8 y lo escribe."""
+        self.write_bytes(self.encode(text))
+
+    def encode(self, text: str) -> bytes:
+        """Devuelve los bytes que write escribiría para este texto."""
+        data = text.encode('utf-8')
+        if self._newline is not None:
+            data = data.replace(b'\n', self._newline)
+        return data
+
+    def write_bytes(self, data: bytes):
+        """Escribe bytes tal cual."""
+        self._raw.write(data)
+        self.offset += len(data)
+
+    def copy_from(self, source: BinaryIO, count: int,
+                  cancel: Optional[threading.Event] = None) -> int:
+        """
+        Copia count bytes de un archivo abierto a la salida.
+
+        Si ambos extremos son archivos del sistema, la copia se hace en el
+        núcleo con os.copy_file_range u os.sendfile sin pasar por Python; si no
+        está disponible se copia por bloques.
+
+        Args:
+            source: Archivo de origen abierto en modo binario, en la posición
+                desde la que copiar
+            count: Bytes a copiar
+            cancel: Si se activa, la copia se detiene en el siguiente bloque
+
+        Returns:
+            Bytes copiados (menos de count si se canceló)
+        """
+        start = source.tell()
+        copied = 0
+        in_fd = out_fd = None
+        if self._zero_copy:
+            try:
+                in_fd = source.fileno()
+                out_fd = self._raw.fileno()
+            except (AttributeError, OSError, ValueError):
+                in_fd = out_fd = None
+
+        if in_fd is not None:
+            self._raw.flush()
+            copied = _kernel_copy(in_fd, out_fd, start, count, cancel)
+            if copied:
+                # Sincronizar la posición del objeto de Python con la del descriptor
+                self._raw.seek(0, os.SEEK_END)
+                source.seek(start + copied)
+
+        while copied < count:
+            if cancel is not None and cancel.is_set():
+                break
+            chunk = source.read(min(COPY_CHUNK_SIZE, count - copied))
+            if not chunk:
+                break
+            self._raw.write(chunk)
+            copied += len(chunk)
+
+        self.offset += copied
+        return copied
+
+    def flush(self):
+        self._raw.flush()
+
+    @property
+    def can_truncate(self) -> bool:
+        """Si se puede descartar lo ya escrito (solo en un archivo sin comprimir)."""
+        return self._zero_copy
+
+    def truncate(self, offset: int):
+        """Descarta todo lo escrito a partir de offset."""
+        if not self.can_truncate:
+            raise io.UnsupportedOperation("La salida no admite truncar")
+        self._raw.flush()
+        self._raw.seek(offset)
+        self._raw.truncate()
+        self.offset = offset
+
+
+def open_output(path: str, output_format: str = 'text', compression_level: int = 6,
+                threaded: bool = False, name: Optional[str] = None) -> BinaryIO:
+    """
+    Abre el archivo de salida en modo binario.
+
+    Args:
+        path: Ruta del archivo de salida
+        output_format: Uno de OUTPUT_FORMATS
+        compression_level: Nivel de compresión (1-9) para los formatos comprimidos
+        threaded: Comprime en un hilo aparte, en paralelo con la lectura de archivos
+        name: Ruta final de la salida si path es un temporal; gzip guarda su
+            nombre en la cabecera (xz y bz2 no guardan ningún nombre)
+
+    Returns:
+        Objeto de archivo binario; los bytes escritos se comprimen al vuelo
+    """
+    if output_format == 'text':
+        return open(path, 'wb')
+    # Cada compresor se importa solo si se usa, no al arrancar
+    if output_format == 'gzip':
+        import gzip
+        fileobj = open(path, 'wb')
+        try:
+            raw = gzip.GzipFile(name or path, 'wb', compression_level, fileobj)
+        except BaseException:
+            fileobj.close()
+            raise
+        raw.myfileobj = fileobj  # Como en gzip.open: close() cierra también el archivo
+    elif output_format == 'xz':
+        import lzma
+        raw = lzma.open(path, 'wb', preset=compression_level)
+    elif output_format == 'bz2':
+        import bz2
+        raw = bz2.open(path, 'wb', compresslevel=compression_level)
+    else:
+        raise ValueError(f"Formato de salida no soportado: {output_format}")
+    return ThreadedWriter(raw) if threaded else raw
+
+
+class ThreadedWriter:
+    """
+    Envía las escrituras a un hilo aparte que las pasa al archivo de destino.
+
+    Con un compresor como destino, la compresión se solapa con la lectura y
+    decodificación de archivos. Las escrituras pequeñas se agrupan en bloques
+    y la cola está acotada, de modo que la memoria retenida es limitada.
+    """
+
+    BLOCK_SIZE = 256 * 1024
+    MAX_PENDING_BLOCKS = 16
+
+    def __init__(self, raw: BinaryIO):
+        import queue
+
+        self._raw = raw
+        self._buffer = bytearray()
+        self._queue = queue.Queue(self.MAX_PENDING_BLOCKS)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name='extractor-compress', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, data: bytes) -> int:
+        if self._error is not None:
+            raise self._error
+        self._buffer += data
+        if len(self._buffer) >= self.BLOCK_SIZE:
+            self._queue.put(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._thread.is_alive():
+            if self._buffer:
+                self._queue.put(bytes(self._buffer))
+                self._buffer.clear()
+            self._queue.put(None)
+            self._thread.join()
+            self._raw.close()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        while True:
+            block = self._queue.get()
+            if block is None:
+                break
+            if self._error is None:
+                try:
+                    self._raw.write(block)
+                except BaseException as e:
+                    # Se relanza en el hilo principal en la siguiente escritura
+                    self._error = e
+
+
+def _kernel_copy(in_fd: int, out_fd: int, offset: int, count: int,
+                 cancel: Optional[threading.Event] = None) -> int:
+    """
+    Copia bytes entre descriptores dentro del núcleo.
+
+    Returns:
+        Bytes copiados (0 si el sistema no lo permite para estos descriptores)
+    """
+    copied = 0
+    for method in ('copy_file_range', 'sendfile'):
+        if not hasattr(os, method):
+            continue
+        try:
+            while copied < count:
+                if cancel is not None and cancel.is_set():
+                    return copied
+                size = min(KERNEL_COPY_CHUNK_SIZE, count - copied)
+                if method == 'copy_file_range':
+                    sent = os.copy_file_range(in_fd, out_fd, size, offset + copied)
+                else:
+                    sent = os.sendfile(out_fd, in_fd, offset + copied, size)
+                if sent == 0:
+                    break
+                copied += sent
+        except OSError:
+            # No soportado entre estos descriptores (p. ej. EXDEV o ENOSYS)
+            pass
+        if copied:
+            break
+    return copied
@@ -0,0 +1,175 @@
+"""
+Motor asyncio de la extracción.
+
+Cada etapa (lectura, decodificación...) es un grupo de corrutinas unido a la
+siguiente por una cola acotada. Un límite de bytes y de elementos en vuelo,
+que solo se libera cuando el consumidor (el escritor) recibe el siguiente
+resultado, frena la entrada si el escritor va más lento, de modo que la
+memoria y los archivos abiertos no dependen del tamaño del árbol.
+"""
+
+import asyncio
+import queue
+import threading
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+# Una etapa: corrutina que transforma un elemento y número de corrutinas que la ejecutan
+Stage = Tuple[Callable[[Any], Awaitable[Any]], int]
+
+_ITEM = 'item'
+_DONE = 'done'
+_ERROR = 'error'
+
+
+class _InFlight:
+    """Bytes y elementos que han entrado en el pipeline y el consumidor aún no ha recibido."""
+
+    def __init__(self, max_bytes: int, max_items: int, max_pinned: int):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.max_pinned = max_pinned
+        self.bytes = 0
+        self.items = 0
+        self.pinned = 0  # Elementos que retienen un recurso, como un archivo abierto
+        self._freed = asyncio.Event()
+
+    async def acquire(self, size: int, pinned: bool) -> Tuple[int, bool]:
+        """Espera a que quepa un elemento de size bytes y lo reserva."""
+        # Un elemento mayor que el límite entra cuando el pipeline está vacío
+        size = min(size, self.max_bytes)
+        while self.items and (self.items >= self.max_items or self.bytes + size > self.max_bytes
+                              or (pinned and self.pinned >= self.max_pinned)):
+            self._freed.clear()
+            await self._freed.wait()
+        self.bytes += size
+        self.items += 1
+        self.pinned += pinned
+        return size, pinned
+
+    def release(self, reserved: Tuple[int, bool]):
+        size, pinned = reserved
+        self.bytes -= size
+        self.items -= 1
+        self.pinned -= pinned
+        self._freed.set()
+
+
+def iter_pipeline(items: Iterable[Any], stages: Sequence[Stage], weight: Callable[[Any], int],
+                  max_inflight_bytes: int, max_items: int, queue_size: int,
+                  pinned: Optional[Callable[[Any], bool]] = None,
+                  max_pinned: Optional[int] = None) -> Iterator[Any]:
+    """
+    Pasa cada elemento por las etapas y devuelve los resultados en el orden de entrada.
+
+    El bucle de eventos corre en un hilo propio; el consumidor itera desde el
+    suyo. Si deja de iterar, las etapas se cancelan.
+
+    Args:
+        items: Elementos de entrada, en el orden deseado
+        stages: Etapas en orden; las corrutinas no deberían lanzar excepciones
+            (si lo hacen, la excepción se relanza al consumidor)
+        weight: Bytes que un elemento ocupa mientras está en vuelo
+        max_inflight_bytes: Máximo de bytes en vuelo
+        max_items: Máximo de elementos en vuelo
+        queue_size: Capacidad de cada cola entre etapas
+        pinned: Si un elemento retiene un recurso (p. ej. un archivo abierto)
+            hasta que el consumidor lo recibe
+        max_pinned: Máximo de elementos en vuelo que retienen un recurso
+            (por defecto, max_items)
+
+    Yields:
+        El resultado de la última etapa para cada elemento, en orden
+    """
+    results: queue.Queue = queue.Queue()
+    started = threading.Event()
+    state = {}
+
+    async def main():
+        state['loop'] = asyncio.get_running_loop()
+        state['task'] = asyncio.current_task()
+        state['inflight'] = inflight = _InFlight(max_inflight_bytes, max_items,
+                                                 max_items if max_pinned is None else max_pinned)
+        started.set()
+        try:
+            await _run(items, stages, weight, pinned, inflight, queue_size, results)
+        except asyncio.CancelledError:
+            pass
+        except BaseException as e:
+            results.put((_ERROR, e, 0))
+
+    thread = threading.Thread(target=asyncio.run, args=(main(),),
+                              name='extractor-pipeline', daemon=True)
+    thread.start()
+    started.wait()
+    loop = state['loop']
+    try:
+        while True:
+            kind, value, reserved = results.get()
+            if kind == _DONE:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+            # El consumidor ya ha terminado con el elemento anterior
+            _call_in_loop(loop, state['inflight'].release, reserved)
+    finally:
+        _call_in_loop(loop, state['task'].cancel)
+        thread.join()
+
+
+def _call_in_loop(loop: asyncio.AbstractEventLoop, callback: Callable, *args):
+    try:
+        loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+        # El bucle ya terminó: nadie espera esta llamada
+        pass
+
+
+async def _run(items: Iterable[Any], stages: Sequence[Stage], weight: Callable[[Any], int],
+               pinned: Optional[Callable[[Any], bool]], inflight: _InFlight, queue_size: int,
+               results: queue.Queue):
+    """Conecta la entrada, las etapas y la reordenación con colas acotadas."""
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+
+    async def feed():
+        for seq, item in enumerate(items):
+            reserved = await inflight.acquire(weight(item), pinned is not None and pinned(item))
+            await queues[0].put((seq, item, reserved))
+        for _ in range(stages[0][1]):
+            await queues[0].put(None)
+
+    async def worker(func: Callable[[Any], Awaitable[Any]], source: asyncio.Queue,
+                     target: asyncio.Queue):
+        while True:
+            job = await source.get()
+            if job is None:
+                return
+            seq, value, reserved = job
+            await target.put((seq, await func(value), reserved))
+
+    async def run_stage(number: int):
+        func, workers = stages[number]
+        await asyncio.gather(*(worker(func, queues[number], queues[number + 1])
+                               for _ in range(workers)))
+        # Avisar a cada corrutina de la etapa siguiente (o a la reordenación)
+        next_workers = stages[number + 1][1] if number + 1 < len(stages) else 1
+        for _ in range(next_workers):
+            await queues[number + 1].put(None)
+
+    async def reorder():
+        # Las etapas con varias corrutinas terminan en desorden
+        pending = {}
+        next_seq = 0
+        while True:
+            job = await queues[-1].get()
+            if job is None:
+                break
+            seq, value, reserved = job
+            pending[seq] = (value, reserved)
+            while next_seq in pending:
+                value, reserved = pending.pop(next_seq)
+                results.put((_ITEM, value, reserved))
+                next_seq += 1
+        results.put((_DONE, None, 0))
+
+    await asyncio.gather(feed(), *(run_stage(number) for number in range(len(stages))), reorder())
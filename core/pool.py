@@ -0,0 +1,176 @@
+"""
+Utilidades para ejecutar trabajo por archivo en paralelo conservando el orden.
+"""
+
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+# Motores de lectura: hilos con ventana (iter_ordered) o etapas asyncio (core.pipeline)
+ENGINES = ('threads', 'asyncio')
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def iter_ordered(func: Callable[[T], R], items: Iterable[T], jobs: int,
+                 window: int = 0, executor: Optional['Executor'] = None) -> Iterator[R]:
+    """
+    Aplica func a cada elemento y devuelve los resultados en el orden de entrada.
+
+    Con jobs <= 1 (y sin executor) todo se ejecuta en el hilo actual. En otro
+    caso un pool de hilos procesa por adelantado como máximo `window`
+    elementos, de modo que la memoria retenida queda acotada aunque el
+    consumidor sea más lento.
+
+    Args:
+        func: Función a aplicar (no debe lanzar excepciones)
+        items: Elementos de entrada, en el orden deseado
+        jobs: Número de hilos de trabajo
+        window: Elementos en vuelo como máximo (por defecto jobs * 4)
+        executor: Pool compartido al que enviar el trabajo, que no se cierra
+            al terminar (por defecto se crea uno de jobs hilos)
+
+    Yields:
+        Los resultados de func, en el mismo orden que items
+    """
+    if jobs <= 1 and executor is None:
+        for item in items:
+            yield func(item)
+        return
+
+    # concurrent.futures solo se importa si hay trabajo en paralelo, no al arrancar
+    from concurrent.futures import ThreadPoolExecutor, wait
+
+    window = window or max(jobs, 1) * 4
+    owned = executor is None
+    if owned:
+        executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='extractor')
+    pending = deque()
+    iterator = iter(items)
+    try:
+        for item in iterator:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                break
+
+        while pending:
+            future = pending.popleft()
+            for item in iterator:
+                pending.append(executor.submit(func, item))
+                break
+            yield future.result()
+    finally:
+        # Si el consumidor se detiene (p. ej. cancelación), descartar lo pendiente
+        if owned:
+            executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+
+
+class FairExecutor:
+    """
+    Pool de hilos compartido por varios clientes, atendidos por turnos.
+
+    Cada cliente (p. ej. cada carpeta de un lote) tiene su propia cola de
+    tareas y los hilos toman la siguiente tarea del siguiente cliente con
+    trabajo pendiente, de modo que una carpeta con muchos archivos no deja
+    esperando a las demás.
+
+    Ejemplo:
+        pool = FairExecutor(8)
+        client = pool.client()
+        results = iter_ordered(func, items, 1, executor=client)
+    """
+
+    def __init__(self, workers: int, thread_name_prefix: str = 'extractor'):
+        self._queues: Dict['_FairClient', deque] = {}
+        self._turns = deque()  # Clientes con tareas pendientes, en orden de turno
+        self._changed = threading.Condition()
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f'{thread_name_prefix}_{i}', daemon=True)
+            for i in range(max(workers, 1))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def client(self) -> 'Executor':
+        """Crea un cliente: un Executor cuyas tareas se atienden por turnos con las de los demás."""
+        return _FairClient(self)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """Detiene los hilos cuando terminan las tareas (o las descarta con cancel_futures)."""
+        with self._changed:
+            self._shutdown = True
+            if cancel_futures:
+                for tasks in self._queues.values():
+                    for future, _, _, _ in tasks:
+                        future.cancel()
+                self._queues.clear()
+                self._turns.clear()
+            self._changed.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _submit(self, client: '_FairClient', fn: Callable, args: tuple, kwargs: dict) -> 'Future':
+        from concurrent.futures import Future
+
+        future = Future()
+        with self._changed:
+            if self._shutdown:
+                raise RuntimeError("No se pueden enviar tareas a un pool cerrado")
+            tasks = self._queues.get(client)
+            if tasks is None:
+                tasks = self._queues[client] = deque()
+                self._turns.append(client)
+            tasks.append((future, fn, args, kwargs))
+            self._changed.notify()
+        return future
+
+    def _work(self):
+        while True:
+            with self._changed:
+                while not self._turns and not self._shutdown:
+                    self._changed.wait()
+                if not self._turns:
+                    return
+                client = self._turns.popleft()
+                tasks = self._queues[client]
+                future, fn, args, kwargs = tasks.popleft()
+                if tasks:
+                    # Al final de la fila: primero van los demás clientes
+                    self._turns.append(client)
+                else:
+                    del self._queues[client]
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class _FairClient:
+    """
+    Vista de un FairExecutor para un cliente; cerrarla no detiene el pool.
+
+    Implementa la parte de la interfaz de Executor que usan iter_ordered y
+    loop.run_in_executor (submit y shutdown) sin heredar de ella, para no
+    importar concurrent.futures al cargar el módulo.
+    """
+
+    def __init__(self, pool: FairExecutor):
+        self._pool = pool
+
+    def submit(self, fn, /, *args, **kwargs) -> 'Future':
+        return self._pool._submit(self, fn, args, kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        pass
@@ -0,0 +1,126 @@
+"""
+Informe de progreso de una extracción.
+
+El progreso se pondera por bytes (con los tamaños del escaneo) para que no se
+detenga en los archivos grandes, y las actualizaciones se agrupan para no
+llamar a la interfaz más de unas pocas veces por segundo.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+_MIN_ELAPSED_FOR_ETA = 0.5  # Segundos antes de estimar velocidad y tiempo restante
+
+
+class ProgressReporter:
+    """Agrupa las actualizaciones de progreso y las envía a un callback."""
+
+    def __init__(self, callback: Callable[[float, str], None], total_bytes: int, total_files: int,
+                 max_rate: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            callback: Recibe (porcentaje de 0 a 100, texto de estado)
+            total_bytes: Bytes de todos los archivos a procesar
+            total_files: Número de archivos a procesar
+            max_rate: Máximo de llamadas al callback por segundo (0 = sin límite)
+            clock: Reloj monótono en segundos
+        """
+        self.callback = callback
+        self.total_bytes = total_bytes
+        self.total_files = total_files
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.done_bytes = 0
+        self.done_files = 0
+        self._clock = clock
+        self._start = clock()
+        self._last_report: Optional[float] = None
+        self._label = ''
+        self._pending = False
+        # Varias partes de la salida pueden avanzar a la vez
+        self._lock = threading.Lock()
+
+    def start(self, label: str):
+        """
+        Muestra el archivo que empieza a procesarse, sin sumarlo aún.
+
+        Args:
+            label: Nombre a mostrar
+        """
+        with self._lock:
+            self._label = label
+            self._throttled_report()
+
+    def advance(self, num_bytes: int, label: Optional[str] = None):
+        """
+        Suma un archivo ya procesado (o descartado) al progreso.
+
+        Args:
+            num_bytes: Tamaño del archivo según el escaneo
+            label: Nombre a mostrar (None conserva el anterior)
+        """
+        with self._lock:
+            self.done_bytes += num_bytes
+            self.done_files += 1
+            if label is not None:
+                self._label = label
+            self._throttled_report()
+
+    def finish(self):
+        """Envía la última actualización si quedó alguna pendiente."""
+        with self._lock:
+            if self._pending:
+                self._report(self._clock())
+
+    @property
+    def percent(self) -> float:
+        if self.total_bytes > 0:
+            return min(100.0, self.done_bytes * 100 / self.total_bytes)
+        if self.total_files > 0:
+            return min(100.0, self.done_files * 100 / self.total_files)
+        return 100.0
+
+    def status_text(self, now: Optional[float] = None) -> str:
+        """Texto de estado: archivo actual, velocidad y tiempo restante."""
+        parts = [f"Procesando: {self._label}"]
+        elapsed = (now if now is not None else self._clock()) - self._start
+        if elapsed >= _MIN_ELAPSED_FOR_ETA and self.done_bytes > 0:
+            rate = self.done_bytes / elapsed
+            parts.append(f"{format_size(rate)}/s")
+            remaining = max(0, self.total_bytes - self.done_bytes)
+            if remaining:
+                parts.append(f"quedan {format_duration(remaining / rate)}")
+        return " · ".join(parts)
+
+    def _throttled_report(self):
+        """Informa ahora o, si es demasiado pronto, deja la actualización pendiente."""
+        now = self._clock()
+        if (self._last_report is not None and now - self._last_report < self.min_interval
+                and self.done_files < self.total_files):
+            self._pending = True
+            return
+        self._report(now)
+
+    def _report(self, now: float):
+        self._last_report = now
+        self._pending = False
+        # Dentro del lock para que los porcentajes lleguen en orden
+        self.callback(self.percent, self.status_text(now))
+
+
+def format_size(num_bytes: float) -> str:
+    """Tamaño legible: 512 B, 1.5 KB, 12.3 MB..."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unit == 'GB':
+            return f"{num_bytes:.0f} {unit}" if unit == 'B' else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def format_duration(seconds: float) -> str:
+    """Duración como m:ss o h:mm:ss."""
+    seconds = int(seconds + 0.5)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
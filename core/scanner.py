@@ -0,0 +1,235 @@
+"""
+Fase de escaneo: recorre la carpeta de origen una sola vez y produce un
+manifiesto en memoria con los datos de cada archivo.
+"""
+
+import os
+import stat
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional
+
+from core.gitignore import GITIGNORE_FILENAME, GitignoreMatcher
+
+SOURCE_MODES = ('walk', 'git')
+
+
+@dataclass
+class FileEntry:
+    """Datos de un archivo obtenidos durante el escaneo."""
+    path: str
+    rel_path: str
+    name: str
+    size: Optional[int]  # None si no se pudo obtener el stat
+    mtime_ns: Optional[int]
+    inode: Optional[int]
+    extension: str
+    allowed: bool
+
+
+@dataclass
+class DirectoryEntry:
+    """Carpeta visitada durante el escaneo, en el mismo orden que os.walk."""
+    path: str
+    rel_path: str
+    subdirs: List[str]  # Subcarpetas permitidas (tras filtrar exclusiones)
+    files: List[FileEntry]
+    folder_count: int = 0  # Subcarpetas encontradas antes de filtrar
+
+    @property
+    def allowed_files(self) -> List[FileEntry]:
+        return [entry for entry in self.files if entry.allowed]
+
+
+@dataclass
+class ScanManifest:
+    """Resultado completo del escaneo de una carpeta de origen."""
+    source_path: str
+    directories: List[DirectoryEntry] = field(default_factory=list)
+
+    def iter_files(self) -> Iterator[FileEntry]:
+        for directory in self.directories:
+            yield from directory.files
+
+    @property
+    def allowed_files(self) -> List[FileEntry]:
+        return [entry for entry in self.iter_files() if entry.allowed]
+
+    @property
+    def total_allowed(self) -> int:
+        return sum(1 for entry in self.iter_files() if entry.allowed)
+
+
+def iter_scan(source_path: str,
+              folder_allowed: Callable[[str, str], bool],
+              file_allowed: Callable[[str, str, Optional[int]], bool],
+              ignore: Optional[GitignoreMatcher] = None) -> Iterator[DirectoryEntry]:
+    """
+    Recorre la carpeta de origen con os.scandir, en el mismo orden que os.walk.
+
+    Cada archivo se consulta con stat una única vez; los enlaces simbólicos a
+    carpetas se listan pero no se recorren, igual que os.walk.
+
+    Args:
+        source_path: Carpeta de origen
+        folder_allowed: Recibe la ruta relativa y el nombre de una subcarpeta y
+            decide si se recorre
+        file_allowed: Recibe la ruta relativa, el nombre y el tamaño de un archivo
+        ignore: Reglas de .gitignore (opcional); las carpetas ignoradas no se
+            recorren y los archivos ignorados se marcan como no permitidos
+
+    Yields:
+        Una DirectoryEntry por carpeta visitada
+    """
+    stack = [(source_path, ignore)]
+
+    while stack:
+        top, ignore = stack.pop()
+        try:
+            scandir_it = os.scandir(top)
+        except OSError:
+            continue
+
+        dir_entries = []
+        file_entries = []
+        with scandir_it:
+            for entry in scandir_it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dir_entries.append(entry)
+                else:
+                    file_entries.append(entry)
+
+        rel_dir = os.path.relpath(top, source_path)
+        if ignore is not None and any(entry.name == GITIGNORE_FILENAME for entry in file_entries):
+            ignore = ignore.enter(top, rel_dir)
+
+        files = []
+        for entry in file_entries:
+            try:
+                st = entry.stat()
+                size, mtime_ns, inode = st.st_size, st.st_mtime_ns, st.st_ino or entry.inode()
+            except OSError:
+                size, mtime_ns, inode = None, None, None
+
+            _, ext = os.path.splitext(entry.name)
+            rel_path = _join_rel(rel_dir, entry.name)
+            files.append(FileEntry(
+                path=entry.path,
+                rel_path=rel_path,
+                name=entry.name,
+                size=size,
+                mtime_ns=mtime_ns,
+                inode=inode,
+                extension=ext.lower(),
+                allowed=(file_allowed(rel_path, entry.name, size)
+                         and (ignore is None or not ignore.is_ignored(rel_path, entry.name, False))),
+            ))
+
+        # Filtrar carpetas excluidas
+        kept_dirs = []
+        for entry in dir_entries:
+            rel_path = _join_rel(rel_dir, entry.name)
+            if not folder_allowed(rel_path, entry.name):
+                continue
+            if ignore is not None and ignore.is_ignored(rel_path, entry.name, True):
+                continue
+            kept_dirs.append(entry)
+
+        yield DirectoryEntry(
+            path=top,
+            rel_path=rel_dir,
+            subdirs=[entry.name for entry in kept_dirs],
+            files=files,
+            folder_count=len(dir_entries),
+        )
+
+        for entry in reversed(kept_dirs):
+            try:
+                if entry.is_symlink():
+                    continue
+            except OSError:
+                continue
+            stack.append((entry.path, ignore))
+
+
+def iter_tracked(source_path: str, rel_paths: List[str],
+                 folder_allowed: Callable[[str, str], bool],
+                 file_allowed: Callable[[str, str, Optional[int]], bool]) -> Iterator[DirectoryEntry]:
+    """
+    Construye el manifiesto a partir de una lista de archivos ya conocida (por
+    ejemplo, los versionados en el índice de git) sin listar ninguna carpeta.
+
+    Las carpetas se visitan en preorden y por orden alfabético. Los archivos que
+    ya no existen en disco se omiten; los demás se consultan con stat una vez,
+    porque los datos guardados en el índice pueden estar desactualizados.
+
+    Args:
+        source_path: Carpeta de origen
+        rel_paths: Rutas de archivo relativas a source_path
+        folder_allowed: Recibe la ruta relativa y el nombre de una subcarpeta y
+            decide si se recorre
+        file_allowed: Recibe la ruta relativa, el nombre y el tamaño de un archivo
+
+    Yields:
+        Una DirectoryEntry por carpeta visitada
+    """
+    # Árbol de carpetas: nombre -> (subcarpetas, archivos)
+    root: tuple = ({}, [])
+    for rel_path in rel_paths:
+        parts = rel_path.split(os.sep)
+        node = root
+        for part in parts[:-1]:
+            node = node[0].setdefault(part, ({}, []))
+        node[1].append(parts[-1])
+
+    stack = [(source_path, os.curdir, root)]
+    while stack:
+        top, rel_dir, (subdirs, names) = stack.pop()
+
+        files = []
+        for name in sorted(names):
+            rel_path = _join_rel(rel_dir, name)
+            path = os.path.join(top, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            except OSError:
+                st = None
+            if st is not None and stat.S_ISDIR(st.st_mode):
+                continue
+            size, mtime_ns, inode = (st.st_size, st.st_mtime_ns, st.st_ino) if st else (None, None, None)
+
+            _, ext = os.path.splitext(name)
+            files.append(FileEntry(
+                path=path,
+                rel_path=rel_path,
+                name=name,
+                size=size,
+                mtime_ns=mtime_ns,
+                inode=inode,
+                extension=ext.lower(),
+                allowed=file_allowed(rel_path, name, size),
+            ))
+
+        kept_dirs = [name for name in sorted(subdirs)
+                     if folder_allowed(_join_rel(rel_dir, name), name)]
+
+        yield DirectoryEntry(
+            path=top,
+            rel_path=rel_dir,
+            subdirs=kept_dirs,
+            files=files,
+            folder_count=len(subdirs),
+        )
+
+        for name in reversed(kept_dirs):
+            stack.append((os.path.join(top, name), _join_rel(rel_dir, name), subdirs[name]))
+
+
+def _join_rel(rel_dir: str, name: str) -> str:
+    """Ruta relativa de un elemento dentro de la carpeta rel_dir."""
+    return name if rel_dir == os.curdir else os.path.join(rel_dir, name)
@@ -0,0 +1,114 @@
+"""
+Salida dividida en partes (shards) de tamaño limitado.
+
+La lista de archivos se reparte, en el orden de la salida, en partes cuyo
+tamaño estimado no supera un máximo. Cada parte es una salida completa, con su
+encabezado y su resumen, y un manifiesto JSON junto a la salida las enumera.
+"""
+
+import os
+from dataclasses import replace
+from typing import Callable, List
+
+from core.scanner import DirectoryEntry, FileEntry, ScanManifest
+
+SHARDS_VERSION = 1
+SHARDS_SUFFIX = '.shards.json'
+_COMPRESSED_EXTENSIONS = ('.gz', '.xz', '.bz2')
+
+
+def shard_path(output_path: str, number: int) -> str:
+    """Ruta de la parte número number (desde 1): salida.txt -> salida.001.txt."""
+    root, ext = os.path.splitext(output_path)
+    if ext in _COMPRESSED_EXTENSIONS:
+        # salida.txt.gz -> salida.001.txt.gz
+        root, inner = os.path.splitext(root)
+        ext = inner + ext
+    return f"{root}.{number:03d}{ext}"
+
+
+def stale_shards(output_path: str, count: int) -> List[str]:
+    """Partes existentes con número mayor que count, de una ejecución anterior con más partes."""
+    paths = []
+    number = count + 1
+    while os.path.exists(shard_path(output_path, number)):
+        paths.append(shard_path(output_path, number))
+        number += 1
+    return paths
+
+
+def shards_manifest_path(output_path: str) -> str:
+    """Ruta del manifiesto de partes asociado a un archivo de salida."""
+    return output_path + SHARDS_SUFFIX
+
+
+def plan_shards(manifest: ScanManifest, max_bytes: int, overhead: int,
+                folder_cost: Callable[[DirectoryEntry], int],
+                file_cost: Callable[[FileEntry], int]) -> List[ScanManifest]:
+    """
+    Reparte las carpetas y archivos del manifiesto en partes.
+
+    Los archivos nunca se dividen: uno más grande que max_bytes ocupa una
+    parte para él solo. Una carpeta cuyos archivos no caben en una parte se
+    continúa en la siguiente, repitiendo su línea de carpeta.
+
+    Args:
+        manifest: Manifiesto completo
+        max_bytes: Tamaño máximo estimado de cada parte
+        overhead: Bytes fijos de cada parte (encabezado y resumen)
+        folder_cost: Bytes de la línea de una carpeta
+        file_cost: Bytes estimados de la sección de un archivo
+
+    Returns:
+        Un manifiesto por parte, con solo los archivos permitidos
+    """
+    shards = [ScanManifest(manifest.source_path)]
+    used = overhead
+    shard_files = 0
+
+    for directory in manifest.directories:
+        part = replace(directory, files=[])
+        cost = folder_cost(directory)
+        if shard_files and used + cost > max_bytes:
+            shards.append(ScanManifest(manifest.source_path))
+            used, shard_files = overhead, 0
+        shards[-1].directories.append(part)
+        used += cost
+
+        for entry in directory.allowed_files:
+            cost = file_cost(entry)
+            if shard_files and used + cost > max_bytes:
+                if not part.files:
+                    # La carpeta aún no tiene archivos en esta parte: pasa entera a la siguiente
+                    shards[-1].directories.pop()
+                shards.append(ScanManifest(manifest.source_path))
+                part = replace(directory, files=[])
+                shards[-1].directories.append(part)
+                used, shard_files = overhead + folder_cost(directory), 0
+            part.files.append(entry)
+            used += cost
+            shard_files += 1
+
+    return shards
+
+
+def write_shards_manifest(output_path: str, source_path: str, shards: List[dict]):
+    """
+    Escribe el manifiesto que enumera las partes de una salida.
+
+    Args:
+        output_path: Salida pedida (las partes se escriben junto a ella)
+        source_path: Carpeta de origen
+        shards: Datos de cada parte, en orden
+    """
+    import json  # Solo si se divide la salida, no al arrancar
+
+    data = {
+        'version': SHARDS_VERSION,
+        'source_path': os.path.abspath(source_path),
+        'shards': shards,
+    }
+    tmp_path = shards_manifest_path(output_path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, shards_manifest_path(output_path))
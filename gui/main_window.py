@@ -9,7 +9,6 @@ import os
 import threading
 from pathlib import Path
 
-from core.file_extractor import FileExtractor
 from gui.components import ModernButton, ModernFrame, ProgressDialog, ConfigDialog
 from config import (
     WINDOW_TITLE, WINDOW_SIZE, WINDOW_MIN_SIZE, COLORS,
@@ -27,7 +26,7 @@ class CodeExtractorGUI:
         self.root.minsize(*WINDOW_MIN_SIZE)
         self.root.configure(bg=COLORS["bg_primary"])
         
-        self.extractor = FileExtractor()
+        self._extractor = None
         self.current_source_path = ""
         self.current_output_path = ""
         self.extraction_thread = None
@@ -37,6 +36,14 @@ class CodeExtractorGUI:
         self.create_widgets()
         self.setup_drag_drop()
     
+    @property
+    def extractor(self):
+        """Extractor, creado la primera vez que se usa para no retrasar la ventana."""
+        if self._extractor is None:
+            from core.file_extractor import FileExtractor
+            self._extractor = FileExtractor()
+        return self._extractor
+    
     def setup_window(self):
         """Configura la ventana principal."""
         self.root.title(WINDOW_TITLE)
@@ -434,6 +441,10 @@ class CodeExtractorGUI:
     def extraction_completed(self, processed_files, errors, output_path):
         """Maneja la finalización exitosa de la extracción."""
         self.progress_dialog.close()
+        if self.extractor.last_stats.get('cancelled'):
+            # La cancelación llegó antes de publicar: la salida anterior no se ha tocado
+            self.update_status("Extracción cancelada. La salida anterior se conserva.")
+            return
         
         message = f"Extracción completada exitosamente!\n\n"
         message += f"📁 Archivos procesados: {processed_files}\n"
@@ -455,8 +466,8 @@ class CodeExtractorGUI:
     
     def cancel_extraction(self):
         """Cancela la extracción en curso."""
-        if self.extractor:
-            self.extractor.cancel_extraction()
+        if self._extractor:
+            self._extractor.cancel_extraction()
         self.update_status("Extracción cancelada.")
     
     def clear_selection(self):
@@ -475,4 +486,6 @@ class CodeExtractorGUI:
     
     def run(self):
         """Inicia la aplicación."""
+        # Cargar el extractor cuando la ventana ya se ha pintado
+        self.root.after_idle(lambda: self.extractor)
         self.root.mainloop()
@@ -10,12 +10,10 @@ import os
 # Agregar el directorio actual al path para importar módulos locales
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog, QHBoxLayout, QFrame, QTextEdit, QStatusBar, QLineEdit
-from PySide6.QtGui import QDragEnterEvent, QDropEvent, QFont, QIcon, QColor, QPalette
-from PySide6.QtCore import Qt, QTimer
-from core.file_extractor import FileExtractor
+from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog, QHBoxLayout, QFrame, QStatusBar, QLineEdit, QProgressBar
+from PySide6.QtGui import QDragEnterEvent, QDropEvent, QFont, QIcon
+from PySide6.QtCore import Qt, QTimer, QThread, Signal
 from config import DEFAULT_OUTPUT_FILENAME, DEFAULT_LOG_FILENAME
-import os
 
 class DragDropFrame(QFrame):
     def __init__(self, parent=None):
@@ -198,17 +196,56 @@ class DragDropFrame(QFrame):
             }
         """)
 
+class ExtractionWorker(QThread):
+    """Ejecuta la extracción fuera del hilo de la interfaz.
+
+    Los resultados llegan a la ventana por señales; como el receptor vive en
+    el hilo principal, Qt las entrega en cola y nunca se toca un widget desde
+    este hilo.
+    """
+    progress = Signal(float, str)
+    completed = Signal(int, list)
+    failed = Signal(str)
+
+    def __init__(self, extractor, source_path, output_path, log_path, parent=None):
+        super().__init__(parent)
+        self.extractor = extractor
+        self.source_path = source_path
+        self.output_path = output_path
+        self.log_path = log_path
+
+    def run(self):
+        self.extractor.set_progress_callback(self.progress.emit)
+        try:
+            processed_files, errors = self.extractor.extract_content(
+                self.source_path, self.output_path, self.log_path)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(processed_files, errors)
+        finally:
+            self.extractor.set_progress_callback(None)
+
 class ExtractorWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Extractor de Código (PySide6)")
         self.setWindowIcon(QIcon(os.path.join(os.path.dirname(__file__), "app_icon.ico")))
         self.setMinimumSize(700, 500)
-        self.extractor = FileExtractor()
+        self._extractor = None
+        self.worker = None
         self.current_source_path = ""
         self.current_output_path = DEFAULT_OUTPUT_FILENAME
         self.init_ui()
 
+    @property
+    def extractor(self):
+        """Extractor, creado la primera vez que se usa para no retrasar la ventana."""
+        if self._extractor is None:
+            from core.file_extractor import FileExtractor
+            self._extractor = FileExtractor()
+        return self._extractor
+
     def init_ui(self):
         central = QWidget()
         layout = QVBoxLayout(central)
@@ -258,9 +295,23 @@ class ExtractorWindow(QMainWindow):
         self.btn_clear.setMinimumHeight(36)
         self.btn_clear.clicked.connect(self.clear_selection)
         btn_layout.addWidget(self.btn_clear)
+        self.btn_cancel = QPushButton("⏹️ Cancelar")
+        self.btn_cancel.setStyleSheet("QPushButton { background: #fdecea; color: #c0392b; border-radius: 12px; font-size: 15px; padding: 8px 20px; } QPushButton:hover { background: #f9d6d2; }")
+        self.btn_cancel.setMinimumHeight(36)
+        self.btn_cancel.clicked.connect(self.cancel_extraction)
+        self.btn_cancel.hide()
+        btn_layout.addWidget(self.btn_cancel)
         btn_layout.addStretch()
         layout.addLayout(btn_layout)
 
+        # Barra de progreso (visible solo durante la extracción)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setFixedHeight(8)
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
         # Status bar
         self.status = QStatusBar()
         self.setStatusBar(self.status)
@@ -274,6 +325,8 @@ class ExtractorWindow(QMainWindow):
             self.output_entry.setText(path)
 
     def start_extraction(self):
+        if self.worker is not None:
+            return
         folder = self.drop_frame.file_path
         output_path = self.output_entry.text().strip()
         if not folder:
@@ -282,13 +335,63 @@ class ExtractorWindow(QMainWindow):
         if not output_path:
             self.status.showMessage("Especifica un archivo de salida", 5000)
             return
-        try:
-            log_path = os.path.join(os.path.dirname(output_path), DEFAULT_LOG_FILENAME)
-            processed_files, errors = self.extractor.extract_content(folder, output_path, log_path)
-            msg = f"Extracción completada. Archivos: {processed_files}. Errores: {len(errors)}. Guardado en: {output_path}"
-            self.status.showMessage(msg, 10000)
-        except Exception as e:
-            self.status.showMessage(f"Error: {str(e)}", 10000)
+        log_path = os.path.join(os.path.dirname(output_path), DEFAULT_LOG_FILENAME)
+
+        self.worker = ExtractionWorker(self.extractor, folder, output_path, log_path, self)
+        self.worker.progress.connect(self.update_progress, Qt.QueuedConnection)
+        self.worker.completed.connect(
+            lambda processed_files, errors: self.extraction_completed(processed_files, errors, output_path),
+            Qt.QueuedConnection)
+        self.worker.failed.connect(self.extraction_error, Qt.QueuedConnection)
+        self.worker.finished.connect(self.extraction_finished, Qt.QueuedConnection)
+
+        self.set_running(True)
+        self.status.showMessage("Extrayendo código...")
+        self.worker.start()
+
+    def set_running(self, running):
+        """Ajusta los controles mientras hay una extracción en curso."""
+        self.btn_extract.setEnabled(not running)
+        self.btn_clear.setEnabled(not running)
+        self.drop_frame.setEnabled(not running)
+        self.btn_cancel.setEnabled(True)
+        self.btn_cancel.setVisible(running)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(running)
+
+    def update_progress(self, progress, message):
+        self.progress_bar.setValue(int(progress * 10))
+        self.status.showMessage(message)
+
+    def cancel_extraction(self):
+        if self.worker is None:
+            return
+        self.extractor.cancel_extraction()
+        self.btn_cancel.setEnabled(False)
+        self.status.showMessage("Cancelando...")
+
+    def extraction_completed(self, processed_files, errors, output_path):
+        # Solo cuenta la cancelación que llegó antes de publicar la salida
+        if self.extractor.last_stats.get('cancelled'):
+            self.status.showMessage("Extracción cancelada. La salida anterior se conserva.", 10000)
+            return
+        msg = f"Extracción completada. Archivos: {processed_files}. Errores: {len(errors)}. Guardado en: {output_path}"
+        self.status.showMessage(msg, 10000)
+
+    def extraction_error(self, message):
+        self.status.showMessage(f"Error: {message}", 10000)
+
+    def extraction_finished(self):
+        self.worker.deleteLater()
+        self.worker = None
+        self.set_running(False)
+
+    def closeEvent(self, event):
+        # No cerrar con el hilo aún escribiendo la salida
+        if self.worker is not None:
+            self.extractor.cancel_extraction()
+            self.worker.wait()
+        super().closeEvent(event)
 
     def clear_selection(self):
         # Usar el método reset_display de DragDropFrame
@@ -300,4 +403,6 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     win = ExtractorWindow()
     win.show()
+    # Cargar el extractor cuando la ventana ya se ha pintado
+    QTimer.singleShot(0, lambda: win.extractor)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+La interfaz de línea de comandos debe terminar con los códigos documentados
+y escribir en stdout un resumen JSON con una forma estable.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from core.cli import EXIT_FATAL, EXIT_FILE_ERRORS, EXIT_OK
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_cli(*args):
+    result = subprocess.run([sys.executable, '-m', 'core'] + [str(arg) for arg in args],
+                            cwd=REPO_DIR, capture_output=True, text=True, encoding='utf-8')
+    return result.returncode, result.stdout, result.stderr
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / 'origen'
+    root.mkdir()
+    (root / 'app.py').write_text("print('hola')\n")
+    (root / 'notas.md').write_text("# Notas\n")
+    return root
+
+
+def test_success(tmp_path, source):
+    output = tmp_path / 'salida.txt'
+    code, stdout, _ = _run_cli(source, '-o', output, '--jobs', '2')
+    assert code == EXIT_OK
+    report = json.loads(stdout)
+    assert set(report) == {'source', 'output', 'processed', 'error_count', 'errors',
+                           'elapsed_seconds', 'stats'}
+    assert (report['source'], report['output']) == (str(source), str(output))
+    assert (report['processed'], report['error_count'], report['errors']) == (2, 0, [])
+    assert isinstance(report['elapsed_seconds'], float)
+    assert report['stats']['encoding_tiers'] == {'utf-8': 2}
+    assert output.exists()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="requiere sockets Unix")
+def test_partial_errors(tmp_path, source):
+    # Un socket con extensión permitida: aparece en el escaneo, pero no se puede abrir
+    broken = socket.socket(socket.AF_UNIX)
+    try:
+        broken.bind(str(source / 'roto.py'))
+        output = tmp_path / 'salida.txt'
+        code, stdout, _ = _run_cli(source, '-o', output)
+    finally:
+        broken.close()
+    assert code == EXIT_FILE_ERRORS
+    report = json.loads(stdout)
+    assert (report['processed'], report['error_count']) == (2, 1)
+    assert 'roto.py' in report['errors'][0]
+    assert output.exists()
+
+
+def test_invalid_source(tmp_path):
+    missing = tmp_path / 'no_existe'
+    output = tmp_path / 'salida.txt'
+    code, stdout, stderr = _run_cli(missing, '-o', output)
+    assert code == EXIT_FATAL
+    report = json.loads(stdout)
+    assert set(report) == {'source', 'output', 'fatal', 'elapsed_seconds'}
+    assert str(missing) in report['fatal'] and str(missing) in stderr
+    assert not output.exists()
+
+
+@pytest.mark.parametrize('args', [
+    [],
+    ['--format', 'zip'],
+    ['--compression-level', '12'],
+    ['--jobs', 'muchos'],
+])
+def test_invalid_arguments(tmp_path, source, args):
+    output = tmp_path / 'salida.txt'
+    code, stdout, stderr = _run_cli(*([source, '-o', output] if args else []), *args)
+    assert code == EXIT_FATAL
+    assert stdout == ''
+    assert 'usage:' in stderr
+    assert not output.exists()
+
+
+@pytest.mark.parametrize('args', [
+    ['--shard-size', '0'],
+    ['--incremental', '--format', 'gzip'],
+    ['--engine', 'asyncio', '--max-inflight-mb', '-1'],
+])
+def test_invalid_option_combination(tmp_path, source, args):
+    # Opciones que argparse acepta pero la extracción rechaza: error crítico con resumen
+    output = tmp_path / 'salida.txt'
+    code, stdout, _ = _run_cli(source, '-o', output, *args)
+    assert code == EXIT_FATAL
+    assert set(json.loads(stdout)) == {'source', 'output', 'fatal', 'elapsed_seconds'}
+    assert not output.exists()
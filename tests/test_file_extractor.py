@@ -0,0 +1,292 @@
+"""
+La salida no depende de cómo se lea: hilos, procesos, motor asyncio, lotes y
+modo incremental deben producir los mismos bytes que una ejecución secuencial.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from core.file_extractor import FileExtractor
+
+STREAM_THRESHOLD = 16 * 1024  # Umbral bajo para que el árbol tenga archivos por streaming
+
+LATIN1_TEXT = "# Canción del año: también, pequeño, corazón, ñandú\n" * 40
+
+
+def _make_tree(root):
+    """Árbol pequeño con los casos que cambian la lectura de un archivo."""
+    files = {
+        'README.md': b"# Proyecto\n\nTexto UTF-8: \xc3\xa1rbol\n",
+        'src/app.py': b"def main():\r\n    return 1\r\n",
+        'src/latin1.py': LATIN1_TEXT.encode('latin-1'),
+        'src/bom.py': b"\xef\xbb\xbfprint('con BOM')\n",
+        'src/sin_salto.js': b"console.log('sin salto final')",
+        'src/vacio.txt': b"",
+        'docs/grande.md': b"linea de un archivo grande\n" * 2000,
+        'docs/grande_crlf.txt': b"linea con CRLF\r\n" * 2000,
+        'data/datos.json': b'{"clave": "valor"}\n',
+    }
+    for name in range(30):
+        files[f'pkg/mod{name:02d}.py'] = f"VALOR = {name}\n".encode()
+    for rel_path, content in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+    os.makedirs(os.path.join(root, 'vacia'))
+    return files
+
+
+def _extractor(tmp_path):
+    extractor = FileExtractor()
+    extractor.stream_threshold = STREAM_THRESHOLD
+    extractor.cache_path = str(tmp_path / 'cache.sqlite3')
+    return extractor
+
+
+def _extract(tmp_path, source, name, **options):
+    output = str(tmp_path / name)
+    processed, errors = _extractor(tmp_path).extract_content(source, output, **options)
+    assert errors == []
+    with open(output, 'rb') as f:
+        return processed, f.read()
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / 'src'
+    _make_tree(str(root))
+    return str(root)
+
+
+@pytest.mark.parametrize('binary_output', [False, True])
+@pytest.mark.parametrize('options', [
+    {'jobs': 4},
+    {'jobs': 4, 'detect_processes': 2},
+    {'engine': 'asyncio', 'jobs': 4},
+    {'engine': 'asyncio', 'jobs': 4, 'detect_processes': 2},
+])
+def test_parallel_output_matches_serial(tmp_path, source, options, binary_output):
+    serial = _extract(tmp_path, source, 'serial.txt', binary_output=binary_output)
+    parallel = _extract(tmp_path, source, 'parallel.txt', binary_output=binary_output, **options)
+    assert serial[0] == 39
+    assert parallel == serial
+
+
+def test_batch_output_matches_single(tmp_path, source):
+    other = str(tmp_path / 'otro')
+    shutil.copytree(source, other)
+    expected = [_extract(tmp_path, root, f'single{n}.txt')[1] for n, root in enumerate((source, other))]
+
+    targets = [(source, str(tmp_path / 'batch0.txt')),
+               (str(tmp_path / 'no_existe'), str(tmp_path / 'batch_error.txt')),
+               (other, str(tmp_path / 'batch1.txt'))]
+    results = _extractor(tmp_path).extract_batch(targets, workers=3, parallel_roots=2)
+
+    assert [result.error is None for result in results] == [True, False, True]
+    assert not os.path.exists(targets[1][1])
+    for result, content in zip((results[0], results[2]), expected):
+        assert result.processed_files == 39
+        with open(result.output_path, 'rb') as f:
+            assert f.read() == content
+
+
+@pytest.mark.parametrize('deduplicate', [False, True])
+def test_incremental_matches_full_rebuild(tmp_path, source, deduplicate):
+    output = str(tmp_path / 'incremental.txt')
+    extractor = _extractor(tmp_path)
+    extractor.extract_content(source, output, incremental=True, deduplicate=deduplicate)
+
+    # Modificar, añadir y borrar archivos; mtime distinto aunque el tamaño coincida.
+    # mod03 pasa a ser idéntico a mod05 y copia.md a README.md, cuyo tamaño
+    # era único en la primera ejecución: dos duplicados nuevos de archivos sin cambios
+    with open(os.path.join(source, 'pkg', 'mod03.py'), 'wb') as f:
+        f.write(b"VALOR = 5\n")
+    os.utime(os.path.join(source, 'pkg', 'mod03.py'), ns=(1, 1))
+    with open(os.path.join(source, 'src', 'nuevo.py'), 'wb') as f:
+        f.write(b"NUEVO = True\n")
+    shutil.copyfile(os.path.join(source, 'README.md'), os.path.join(source, 'src', 'copia.md'))
+    os.remove(os.path.join(source, 'data', 'datos.json'))
+
+    processed, errors = extractor.extract_content(source, output, incremental=True, deduplicate=deduplicate)
+    assert errors == []
+    assert extractor.last_stats['spliced_files'] > 0
+    with open(output, 'rb') as f:
+        incremental = f.read()
+    assert (processed, incremental) == _extract(tmp_path, source, 'full.txt', deduplicate=deduplicate)
+
+
+@pytest.mark.parametrize('policy', ['order', 'smallest', 'extension'])
+@pytest.mark.parametrize('budget', [3000, 20000, 60000])
+def test_output_fits_budget(tmp_path, source, policy, budget):
+    output = str(tmp_path / 'budget.txt')
+    extractor = _extractor(tmp_path)
+    extractor.extract_content(source, output, budget_bytes=budget, budget_policy=policy)
+    assert os.path.getsize(output) <= budget
+    assert extractor.last_stats['budget_omitted']
+
+
+_OPEN_FILES_PROBE = """
+import resource, sys, time
+sys.path.insert(0, %r)
+from core.file_extractor import FileExtractor
+write_section = FileExtractor._write_section
+def slow_write_section(self, *args):
+    time.sleep(0.002)  # Escritor lento: la lectura se adelanta todo lo que la dejen
+    return write_section(self, *args)
+FileExtractor._write_section = slow_write_section
+resource.setrlimit(resource.RLIMIT_NOFILE, (%d, resource.getrlimit(resource.RLIMIT_NOFILE)[1]))
+extractor = FileExtractor()
+extractor.stream_threshold = 1024
+processed, errors = extractor.extract_content(%r, %r, jobs=4, detect_processes=4, engine=%r)
+print(processed, len(errors))
+"""
+
+
+@pytest.mark.parametrize('engine', ['threads', 'asyncio'])
+def test_process_pool_bounds_open_files(tmp_path, engine):
+    # Cada archivo por streaming queda abierto hasta escribirse; con el pool
+    # de procesos, los archivos en vuelo no deben depender del tamaño del lote
+    # ni del máximo de elementos en vuelo del motor asyncio
+    pytest.importorskip('resource')
+    root = tmp_path / 'grandes'
+    root.mkdir()
+    for number in range(600):
+        (root / f'archivo{number:03d}.txt').write_bytes(b"linea de texto\n" * 200)
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = _OPEN_FILES_PROBE % (repo_dir, 256, str(root), str(tmp_path / 'salida.txt'), engine)
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ['600', '0']
+
+
+@pytest.mark.parametrize('jobs', [1, 4])
+def test_binary_output_stays_valid_utf8(tmp_path, jobs):
+    # La muestra es ASCII pero el final del archivo no es UTF-8 válido
+    root = tmp_path / 'origen'
+    root.mkdir()
+    (root / 'grande.txt').write_bytes(b"texto ascii\n" * (2 * STREAM_THRESHOLD) + b"caf\xe9\n")
+    (root / 'valido.txt').write_bytes("árbol\n".encode() * (2 * STREAM_THRESHOLD))
+    output = tmp_path / 'salida.txt'
+    extractor = _extractor(tmp_path)
+    assert extractor.extract_content(str(root), str(output), binary_output=True, jobs=jobs) == (2, [])
+    content = output.read_bytes().decode('utf-8')
+    assert content.count("caf\ufffd\n") == 1
+    assert "árbol\n" * (2 * STREAM_THRESHOLD) in content
+    # El archivo válido se sigue copiando sin decodificar
+    assert extractor.last_stats['passthrough_bytes'] == (root / 'valido.txt').stat().st_size
+
+
+def test_cache_write_failure_does_not_fail_extraction(tmp_path, source, monkeypatch):
+    import sqlite3
+    from core.cache import EncodingCache
+
+    def locked(self, items):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(EncodingCache, 'store_many', locked)
+    assert _extract(tmp_path, source, 'cache.txt', use_cache=True) == _extract(tmp_path, source, 'sin.txt')
+
+
+def test_cache_keys_are_absolute_paths(tmp_path, source, monkeypatch):
+    extractor = _extractor(tmp_path)
+    extractor.extract_content(source, str(tmp_path / 'absoluta.txt'), use_cache=True)
+    assert extractor.last_stats['cache_hits'] == 0
+
+    # La misma carpeta con una ruta relativa reutiliza las entradas...
+    monkeypatch.chdir(tmp_path)
+    extractor.extract_content('src', str(tmp_path / 'relativa.txt'), use_cache=True)
+    assert extractor.last_stats['cache_misses'] == 0
+
+    # ...y otra carpeta con la misma ruta relativa no las confunde
+    other = tmp_path / 'otro'
+    other.mkdir()
+    _make_tree(str(other / 'src'))
+    monkeypatch.chdir(other)
+    extractor.extract_content('src', str(tmp_path / 'otra.txt'), use_cache=True)
+    assert extractor.last_stats['cache_hits'] == 0
+
+
+def test_progress_counts_files_after_writing(tmp_path, monkeypatch):
+    import core.file_extractor
+    monkeypatch.setattr(core.file_extractor, 'PROGRESS_MAX_RATE_HZ', 0)  # Sin agrupar
+    root = tmp_path / 'origen'
+    root.mkdir()
+    (root / 'a_pequeno.txt').write_bytes(b"x\n" * 50)
+    (root / 'b_grande.txt').write_bytes(b"linea\n" * (4 * STREAM_THRESHOLD))
+    calls = []
+    extractor = _extractor(tmp_path)
+    extractor.set_progress_callback(lambda percent, text: calls.append((percent, text)))
+    extractor.extract_content(str(root), str(tmp_path / 'salida.txt'))
+
+    # Mientras se escribe el archivo grande, sus bytes aún no cuentan
+    started = [percent for percent, text in calls if text.startswith("Procesando: b_grande.txt")]
+    assert started[0] < 1
+    assert calls[-1][0] == 100
+
+
+@pytest.mark.parametrize('shard_size', [None, 200])
+def test_cancel_reports_whether_output_was_kept(tmp_path, source, monkeypatch, shard_size):
+    output = tmp_path / 'salida.txt'
+    kept = tmp_path / ('salida.001.txt' if shard_size else 'salida.txt')
+    extractor = _extractor(tmp_path)
+
+    # Cancelar mientras se escribe: se conserva la salida anterior
+    kept.write_bytes(b"SALIDA ANTERIOR")
+    extractor.set_progress_callback(lambda percent, text: extractor.cancel_extraction())
+    extractor.extract_content(source, str(output), shard_size=shard_size)
+    assert extractor.last_stats.get('cancelled') is True
+    assert kept.read_bytes() == b"SALIDA ANTERIOR"
+
+    # Cancelar tras publicar: la salida nueva ya sustituyó a la anterior
+    extractor.set_progress_callback(None)
+    publish = FileExtractor._publish
+
+    def publish_then_cancel(self, *args, **kwargs):
+        publish(self, *args, **kwargs)
+        self.cancel_extraction()
+
+    monkeypatch.setattr(FileExtractor, '_publish', publish_then_cancel)
+    extractor.extract_content(source, str(output), shard_size=shard_size)
+    assert 'cancelled' not in extractor.last_stats
+    assert kept.read_bytes() != b"SALIDA ANTERIOR"
+
+
+@pytest.mark.parametrize('options', [{}, {'jobs': 4, 'detect_processes': 2}, {'engine': 'asyncio'}])
+def test_encoding_tier_stats(tmp_path, options):
+    root = tmp_path / 'origen'
+    root.mkdir()
+    (root / 'ascii.py').write_bytes(b"print('hola')\n")
+    (root / 'bom.py').write_bytes(b"\xef\xbb\xbfprint('con BOM')\n")
+    (root / 'latin1.py').write_bytes(LATIN1_TEXT.encode('latin-1'))
+    (root / 'utf8.py').write_bytes("print('árbol')\n".encode())
+    extractor = _extractor(tmp_path)
+    assert extractor.extract_content(str(root), str(tmp_path / 'salida.txt'), **options) == (4, [])
+    assert extractor.last_stats['encoding_tiers'] == {'bom': 1, 'utf-8': 2, 'chardet': 1}
+
+
+@pytest.mark.parametrize('options', [{}, {'jobs': 4, 'detect_processes': 2}, {'engine': 'asyncio'},
+                                     {'use_cache': True}])
+def test_binary_files_are_skipped_and_counted(tmp_path, options):
+    root = tmp_path / 'origen'
+    root.mkdir()
+    (root / 'texto.py').write_bytes(b"print('hola')\n")
+    (root / 'utf16.txt').write_bytes("texto con BOM\n".encode('utf-16'))  # Bytes NUL, pero con BOM
+    (root / 'nul.txt').write_bytes(b"cabecera\x00\x01\x02" * 100)
+    (root / 'control.json').write_bytes(bytes(range(1, 32)) * 10)
+    extractor = _extractor(tmp_path)
+    output = tmp_path / 'salida.txt'
+    for _ in range(2):  # Con caché, la segunda ejecución usa el veredicto guardado
+        assert extractor.extract_content(str(root), str(output), **options) == (2, [])
+        assert extractor.last_stats['binary_skipped'] == 2
+        content = output.read_text(encoding='utf-8')
+        assert "nul.txt" not in content and "control.json" not in content
+        assert "Archivos binarios omitidos: 2\n" in content
+
+    # skip_binary=False los vuelve a incluir
+    assert extractor.extract_content(str(root), str(output), skip_binary=False, **options) == (4, [])
+    assert extractor.last_stats['binary_skipped'] == 0
+    assert "Archivos binarios omitidos" not in output.read_text(encoding='utf-8')
@@ -0,0 +1,95 @@
+"""
+Sin patrones de exclusión, FilterEngine debe decidir exactamente lo mismo que
+las comprobaciones de nombre, extensión y tamaño a las que sustituye.
+"""
+
+import itertools
+import os
+
+import pytest
+
+from config import (DEFAULT_ALLOWED_EXTENSIONS, DEFAULT_EXCLUDED_FILES, DEFAULT_EXCLUDED_FOLDERS,
+                    MAX_FILE_SIZE_MB)
+from core.filters import FilterEngine
+from core.scanner import iter_scan
+
+MAX_FILE_SIZE = MAX_FILE_SIZE_MB * 1024 * 1024
+
+STEMS = ['app', 'README', '.env', 'archivo.min', 'sin_extension', 'Makefile', '']
+EXTENSIONS = ['', '.', '.exe', '.lock', '.PY', '.Js', '.tar.gz'] + DEFAULT_ALLOWED_EXTENSIONS
+FOLDERS = DEFAULT_EXCLUDED_FOLDERS + ['src', 'Build', 'node_modules2', '.github', 'env.d', 'vendors']
+
+
+def _legacy_file_allowed(file_path):
+    """Comprobación de archivos anterior a FilterEngine."""
+    file_name = os.path.basename(file_path)
+    if file_name in DEFAULT_EXCLUDED_FILES:
+        return False
+    _, ext = os.path.splitext(file_name)
+    if ext.lower() not in DEFAULT_ALLOWED_EXTENSIONS:
+        return False
+    try:
+        if os.path.getsize(file_path) > MAX_FILE_SIZE:
+            return False
+    except OSError:
+        return False
+    return True
+
+
+def _legacy_folder_allowed(folder_path):
+    """Comprobación de carpetas anterior a FilterEngine."""
+    return os.path.basename(folder_path) not in DEFAULT_EXCLUDED_FOLDERS
+
+
+def _engine():
+    return FilterEngine(DEFAULT_EXCLUDED_FILES, DEFAULT_EXCLUDED_FOLDERS, DEFAULT_ALLOWED_EXTENSIONS,
+                        max_file_size=MAX_FILE_SIZE)
+
+
+@pytest.mark.parametrize('size', [0, MAX_FILE_SIZE, MAX_FILE_SIZE + 1])
+def test_file_decisions_match_legacy(tmp_path, size):
+    engine = _engine()
+    names = {stem + ext for stem, ext in itertools.product(STEMS, EXTENSIONS)} | set(DEFAULT_EXCLUDED_FILES)
+    names.discard('')
+    names.discard('.')
+    for name in sorted(names):
+        path = tmp_path / name
+        with open(path, 'wb') as f:
+            f.truncate(size)  # Archivo disperso: no ocupa disco aunque supere el máximo
+        rel_path = os.path.join('src', name)
+        assert engine.is_file_allowed(rel_path, name, size) == _legacy_file_allowed(str(path)), name
+        path.unlink()
+
+
+def test_unreadable_file_is_rejected_like_legacy(tmp_path):
+    # Sin tamaño (stat fallido) el archivo se descarta, como antes
+    assert not _legacy_file_allowed(str(tmp_path / 'no_existe.py'))
+    assert not _engine().is_file_allowed('no_existe.py', 'no_existe.py', None)
+
+
+def test_folder_decisions_match_legacy():
+    engine = _engine()
+    for name in FOLDERS:
+        rel_path = os.path.join('src', name)
+        assert engine.is_folder_allowed(rel_path, name) == _legacy_folder_allowed(rel_path), name
+
+
+def test_scan_matches_legacy_walk(tmp_path):
+    root = tmp_path / 'origen'
+    for folder in ['.'] + FOLDERS + [os.path.join('src', name) for name in FOLDERS]:
+        directory = root / folder
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ['app.py', 'estilo.CSS', 'package-lock.json', 'notas.bin', 'Makefile']:
+            (directory / name).write_text('x\n')
+
+    expected = []
+    for current, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if _legacy_folder_allowed(os.path.join(current, d))]
+        expected.append((current, sorted(dirs),
+                         sorted(f for f in files if _legacy_file_allowed(os.path.join(current, f)))))
+
+    engine = _engine()
+    scanned = [(directory.path, sorted(directory.subdirs),
+                sorted(entry.name for entry in directory.allowed_files))
+               for directory in iter_scan(str(root), engine.is_folder_allowed, engine.is_file_allowed)]
+    assert sorted(scanned) == sorted((str(path), dirs, files) for path, dirs, files in expected)
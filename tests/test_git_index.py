@@ -0,0 +1,144 @@
+"""
+El lector del índice de git debe listar los mismos archivos que git ls-files
+en todas las versiones del formato, y rechazar con GitIndexError lo que no
+puede leer.
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from core.git_index import GitIndexError, read_git_index, tracked_files
+
+FILES = [
+    'README.md', 'setup.py',
+    'src/app.py', 'src/app_test.py', 'src/apps/__init__.py', 'src/apps/views.py',
+    'src/zeta/muy/profundo/modulo.py', 'docs/guía.md', 'docs/con espacio.txt',
+]
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason="requiere git")
+
+
+def _git(repo, *args):
+    command = ['git', '-C', str(repo), '-c', 'user.name=Pruebas', '-c', 'user.email=pruebas@example.com',
+               '-c', 'core.quotePath=false']
+    return subprocess.run(command + list(args), capture_output=True, text=True, check=True).stdout
+
+
+def _write_files(root):
+    for rel_path in FILES:
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel_path + '\n', encoding='utf-8')
+    _git(root, 'add', '.')
+
+
+def _make_repo(root):
+    _git(root.parent, 'init', '-q', str(root))
+    _write_files(root)
+    _git(root, 'commit', '-q', '-m', 'inicial')
+    return root
+
+
+def _ls_files(source):
+    """Archivos del índice según git, sin los marcados como skip-worktree."""
+    paths = []
+    for line in _git(source, 'ls-files', '-t').splitlines():
+        tag, path = line.split(' ', 1)
+        if tag != 'S' and path not in paths:
+            paths.append(path)
+    return [path.replace('/', os.sep) for path in paths]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return _make_repo(tmp_path / 'repo')
+
+
+@pytest.mark.parametrize('version', [2, 3, 4])
+def test_tracked_files_match_ls_files(repo, version):
+    (repo / 'nuevo.py').write_text('NUEVO = 1\n')
+    _git(repo, 'add', '-N', 'nuevo.py')  # intent-to-add: entrada con flags extendidos
+    _git(repo, 'update-index', '--index-version', str(version))
+    if version == 2:
+        # Sin flags extendidos, git no sube la versión
+        _git(repo, 'rm', '-q', '--cached', 'nuevo.py')
+    header = (repo / '.git' / 'index').read_bytes()[:8]
+    assert header == b'DIRC' + version.to_bytes(4, 'big')
+    assert tracked_files(str(repo)) == _ls_files(repo)
+
+
+@pytest.mark.parametrize('version', [2, 4])
+def test_tracked_files_in_subfolder(repo, version):
+    _git(repo, 'update-index', '--index-version', str(version))
+    source = repo / 'src'
+    expected = _ls_files(source)
+    assert expected == ['app.py', 'app_test.py', os.path.join('apps', '__init__.py'),
+                        os.path.join('apps', 'views.py'), os.path.join('zeta', 'muy', 'profundo', 'modulo.py')]
+    assert tracked_files(str(source)) == expected
+
+
+@pytest.mark.parametrize('version', [2, 4])
+def test_sha256_repository(tmp_path, version):
+    root = tmp_path / 'sha256'
+    _git(tmp_path, 'init', '-q', '--object-format=sha256', str(root))
+    _write_files(root)
+    _git(root, 'update-index', '--index-version', str(version))
+    assert tracked_files(str(root)) == _ls_files(root)
+
+
+def test_skip_worktree_entries_are_omitted(repo):
+    _git(repo, 'update-index', '--skip-worktree', 'setup.py')
+    paths = tracked_files(str(repo))
+    assert 'setup.py' not in paths
+    assert paths == _ls_files(repo)
+
+
+def test_conflict_stages_listed_once(repo):
+    _git(repo, 'checkout', '-q', '-b', 'otra')
+    (repo / 'setup.py').write_text('otra\n')
+    _git(repo, 'commit', '-q', '-am', 'otra')
+    _git(repo, 'checkout', '-q', '-')
+    (repo / 'setup.py').write_text('principal\n')
+    _git(repo, 'commit', '-q', '-am', 'principal')
+    with pytest.raises(subprocess.CalledProcessError):
+        _git(repo, 'merge', '-q', 'otra')
+    stages = [line.split()[2] for line in _git(repo, 'ls-files', '-s', 'setup.py').splitlines()]
+    assert stages == ['1', '2', '3']
+
+    index = read_git_index(str(repo / '.git' / 'index'))
+    assert [entry.path for entry in index].count('setup.py') == 1
+    assert tracked_files(str(repo)) == _ls_files(repo)
+
+
+def test_outside_repository_returns_none(tmp_path):
+    assert tracked_files(str(tmp_path)) is None
+
+
+def test_split_index_is_rejected(repo):
+    _git(repo, 'update-index', '--split-index')
+    with pytest.raises(GitIndexError):
+        tracked_files(str(repo))
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: b'',
+    lambda data: b'XXXX' + data[4:],
+    lambda data: data[:8].replace(b'\x00\x00\x00\x02', b'\x00\x00\x00\x05') + data[8:],
+    lambda data: data[:12] + data[12:60],
+    lambda data: data[:8] + b'\xff\xff\xff\xff' + data[12:],
+])
+def test_invalid_index_raises(repo, corrupt):
+    index_file = repo / '.git' / 'index'
+    _git(repo, 'update-index', '--index-version', '2')
+    index_file.write_bytes(corrupt(index_file.read_bytes()))
+    with pytest.raises(GitIndexError):
+        tracked_files(str(repo))
+
+
+def test_missing_index_raises(tmp_path):
+    _git(tmp_path, 'init', '-q', str(tmp_path / 'vacio'))
+    with pytest.raises(GitIndexError):
+        tracked_files(str(tmp_path / 'vacio'))
@@ -0,0 +1,146 @@
+"""
+Las reglas de .gitignore del escaneo deben coincidir con las de git, y los
+patrones de exclusión del usuario con su documentación.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from core.file_extractor import FileExtractor
+from core.filters import FilterEngine, glob_to_regex
+
+EXTENSIONS = ['.txt', '.py', '.log']
+
+FILES = [
+    'a.txt', 'keep.log', 'debug.log', 'notes.py',
+    'x/a.txt', 'sub/x/a.txt', 'sub/x.txt',
+    'a/b.txt', 'a/deep/c.py', 'ab/b.txt',
+    'sub/keep.txt', 'sub/drop.txt', 'sub/inner/keep.txt', 'sub/inner/other.py',
+    'logs/keep.txt', 'logs/old.txt',
+    'gen/out.py', 'src/gen/out.py', 'src/main.py',
+    'doc/a.txt', 'doc/api/b.txt', 'file1.py', 'file2.py', 'filea.py',
+    'out.txt/inside.txt', 'space .txt',
+]
+
+# (descripción, {ruta del archivo de patrones: contenido})
+CASES = [
+    ('negación', {'.gitignore': '*.log\n!keep.log\n'}),
+    ('anclada y solo carpetas', {'.gitignore': '/x/\nout.txt/\n'}),
+    ('doble asterisco final', {'.gitignore': 'a/**\n'}),
+    ('doble asterisco inicial', {'.gitignore': '**/gen/*.py\n'}),
+    ('barra intermedia ancla', {'.gitignore': 'doc/*.txt\n'}),
+    ('comodines y clases', {'.gitignore': 'file[0-9].py\n?.txt\n'}),
+    ('espacios y comentarios', {'.gitignore': '# comentario\nspace\\ .txt\nnotes.py   \n'}),
+    ('gitignore anidado', {'.gitignore': '*.txt\n', 'sub/.gitignore': '!keep.txt\n',
+                           'sub/inner/.gitignore': '*.py\n'}),
+    ('anidado vuelve a ignorar', {'.gitignore': '!sub/drop.txt\n', 'sub/.gitignore': 'drop.txt\n'}),
+    ('carpeta ignorada no se reincluye', {'.gitignore': 'logs/\n!logs/keep.txt\n'}),
+    ('info/exclude', {'.git/info/exclude': '*.py\n', '.gitignore': '!src/main.py\n'}),
+]
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason="requiere git")
+
+
+def _git(repo, *args):
+    return subprocess.run(['git', '-C', str(repo)] + list(args), capture_output=True,
+                          text=True, check=True).stdout
+
+
+def _make_repo(root, patterns):
+    _git(root.parent, 'init', '-q', str(root))
+    for rel_path in FILES:
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel_path + '\n')
+    for rel_path, content in patterns.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def _scanned(source):
+    extractor = FileExtractor()
+    extractor.excluded_files = []
+    extractor.excluded_folders = []
+    extractor.excluded_patterns = []
+    extractor.allowed_extensions = EXTENSIONS
+    manifest = extractor.scan(str(source), respect_gitignore=True)
+    return sorted(entry.rel_path.replace(os.sep, '/') for entry in manifest.allowed_files)
+
+
+def _git_files(source):
+    listed = _git(source, 'ls-files', '-co', '--exclude-standard').splitlines()
+    return sorted(path for path in listed if os.path.splitext(path)[1] in EXTENSIONS)
+
+
+@pytest.mark.parametrize('patterns', [patterns for _, patterns in CASES],
+                         ids=[name for name, _ in CASES])
+@pytest.mark.parametrize('subfolder', ['', 'sub'])
+def test_scan_matches_git(tmp_path, patterns, subfolder):
+    repo = tmp_path / 'repo'
+    _make_repo(repo, patterns)
+    source = repo / subfolder if subfolder else repo
+    expected = _git_files(source)
+    assert expected  # El caso debe dejar algún archivo
+    assert _scanned(source) == expected
+
+
+def test_scan_without_repository_uses_found_gitignores(tmp_path):
+    source = tmp_path / 'sin_repo'
+    source.mkdir()
+    (source / '.gitignore').write_text('*.txt\n')
+    (source / 'a.txt').write_text('a\n')
+    # Sin repositorio, solo se aplican los .gitignore encontrados al recorrer
+    assert _scanned(source) == []
+
+
+@pytest.mark.parametrize('pattern, text, matches', [
+    ('*.py', 'a.py', True),
+    ('*.py', 'dir/a.py', False),
+    ('?.txt', 'a.txt', True),
+    ('?.txt', 'ab.txt', False),
+    ('[!a]*', 'b', True),
+    ('[!a]*', 'a', False),
+    ('**/x', 'x', True),
+    ('**/x', 'a/b/x', True),
+    ('a/**/x', 'a/x', True),
+    ('a/**/x', 'a/b/c/x', True),
+    ('a/**', 'a/b/c', True),
+    ('a/**', 'a', True),
+    ('a/**', 'ab/c', False),
+    ('\\*', '*', True),
+    ('\\*', 'a', False),
+])
+def test_glob_to_regex(pattern, text, matches):
+    assert (re.fullmatch(glob_to_regex(pattern), text, re.DOTALL) is not None) == matches
+
+
+def test_filter_engine_patterns():
+    engine = FilterEngine(excluded_files=['secreto.py'], excluded_folders=['build'],
+                          allowed_extensions=['.js', '.py', '.json'],
+                          excluded_patterns=['*.min.js', 'tests/fixtures/**', 'generated/'],
+                          max_file_size=100)
+    join = os.path.join
+    # Patrones sin '/': por nombre, en cualquier carpeta
+    assert not engine.is_file_allowed('app.min.js', 'app.min.js', 10)
+    assert not engine.is_file_allowed(join('static', 'app.min.js'), 'app.min.js', 10)
+    assert engine.is_file_allowed(join('static', 'app.js'), 'app.js', 10)
+    # Patrones con '/': por ruta relativa a la carpeta de origen
+    assert not engine.is_file_allowed(join('tests', 'fixtures', 'a', 'data.json'), 'data.json', 10)
+    assert engine.is_file_allowed(join('src', 'tests', 'fixtures', 'data.json'), 'data.json', 10)
+    assert engine.is_file_allowed(join('tests', 'test_app.py'), 'test_app.py', 10)
+    # 'x/**' excluye también la propia carpeta, que así no se recorre
+    assert not engine.is_folder_allowed(join('tests', 'fixtures'), 'fixtures')
+    assert engine.is_folder_allowed('tests', 'tests')
+    # Una barra final solo marca la carpeta: se compara por nombre
+    assert not engine.is_folder_allowed(join('src', 'generated'), 'generated')
+    # Listas de configuración, extensión y tamaño
+    assert not engine.is_folder_allowed('build', 'build')
+    assert not engine.is_file_allowed('secreto.py', 'secreto.py', 10)
+    assert not engine.is_file_allowed('README.md', 'README.md', 10)
+    assert not engine.is_file_allowed('grande.py', 'grande.py', 101)
+    assert not engine.is_file_allowed('sin_stat.py', 'sin_stat.py', None)
@@ -0,0 +1,64 @@
+"""
+El índice (.idx) debe devolver exactamente cada sección de la salida y no
+debe poder usarse con una salida reescrita después.
+"""
+
+import os
+
+import pytest
+
+from core.file_extractor import FileExtractor
+from core.index import SectionIndex, StaleIndexError, index_path
+
+FILES = {
+    'a/uno.py': "print('uno')\n",
+    'a/sin_salto.py': "print('sin salto final')",
+    'a/z.py': "ESPACIO = 'árbol'\n" * 50,
+    'b/latin1.txt': "canción, año, pequeño\n" * 40,
+    'b/copia.py': "print('uno')\n",
+    'b/vacio.txt': "",
+}
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / 'origen'
+    for rel_path, text in FILES.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(text.encode('latin-1' if rel_path.endswith('latin1.txt') else 'utf-8'))
+    return root
+
+
+@pytest.mark.parametrize('binary_output', [False, True])
+@pytest.mark.parametrize('deduplicate', [False, True])
+def test_index_round_trip(tmp_path, source, binary_output, deduplicate):
+    output = str(tmp_path / 'salida.txt')
+    extractor = FileExtractor()
+    extractor.extract_content(str(source), output, index=True, binary_output=binary_output,
+                              deduplicate=deduplicate)
+    with SectionIndex(output) as index:
+        assert len(index) == len(FILES)
+        for rel_path, text in FILES.items():
+            # El contenido es el de la salida: con el salto de línea final añadido
+            expected = text if text.endswith('\n') else text + '\n'
+            assert index.get(os.path.join(*rel_path.split('/'))) == expected
+
+
+def test_stale_index_is_not_used(tmp_path, source):
+    output = str(tmp_path / 'salida.txt')
+    extractor = FileExtractor()
+    extractor.extract_content(str(source), output, index=True)
+    with open(index_path(output), 'rb') as f:
+        saved = f.read()
+
+    # Una nueva ejecución sin índice borra el índice anterior
+    (source / 'a' / 'z.py').write_text("otro\n")
+    extractor.extract_content(str(source), output)
+    assert not os.path.exists(index_path(output))
+
+    # Un índice antiguo junto a la salida nueva se rechaza
+    with open(index_path(output), 'wb') as f:
+        f.write(saved)
+    with pytest.raises(StaleIndexError):
+        SectionIndex(output)
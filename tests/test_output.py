@@ -0,0 +1,57 @@
+"""
+Las salidas comprimidas al vuelo deben descomprimirse en los mismos bytes que
+la salida de texto.
+"""
+
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+from core.file_extractor import FileExtractor
+
+DECOMPRESS = {'gzip': gzip.decompress, 'xz': lzma.decompress, 'bz2': bz2.decompress}
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / 'origen'
+    (root / 'src').mkdir(parents=True)
+    (root / 'src' / 'app.py').write_bytes("def main():\r\n    return 'árbol'\r\n".encode())
+    (root / 'src' / 'latin1.txt').write_bytes("canción, año\n".encode('latin-1') * 40)
+    # Más de un bloque de ThreadedWriter, para que el hilo de compresión trabaje
+    (root / 'grande.md').write_bytes(b"linea repetida de un archivo grande\n" * 20000)
+    return str(root)
+
+
+@pytest.mark.parametrize('threaded', [False, True])
+@pytest.mark.parametrize('output_format', ['gzip', 'xz', 'bz2'])
+def test_compressed_output_round_trip(tmp_path, source, output_format, threaded):
+    extractor = FileExtractor()
+    text_path = tmp_path / 'salida.txt'
+    extractor.extract_content(source, str(text_path))
+
+    compressed_path = tmp_path / f'salida.txt.{output_format}'
+    processed, errors = extractor.extract_content(source, str(compressed_path), output_format=output_format,
+                                                  compression_level=1, threaded_compression=threaded)
+    assert (processed, errors) == (3, [])
+    data = compressed_path.read_bytes()
+    assert len(data) < text_path.stat().st_size // 10
+    assert DECOMPRESS[output_format](data) == text_path.read_bytes()
+    # No queda ningún temporal junto a la salida
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        ['origen', 'salida.txt', compressed_path.name])
+
+
+@pytest.mark.parametrize('shard_size', [None, 2000])
+def test_gzip_header_keeps_final_name(tmp_path, source, shard_size):
+    output = tmp_path / 'salida.txt.gz'
+    FileExtractor().extract_content(source, str(output), output_format='gzip', shard_size=shard_size)
+    names = ['salida.001.txt.gz'] if shard_size else ['salida.txt.gz']
+    for name in names:
+        header = (tmp_path / name).read_bytes()
+        assert header[:2] == b'\x1f\x8b'
+        assert header[3] & gzip.FNAME
+        # FNAME: nombre sin '.gz' terminado en NUL, justo tras la cabecera fija
+        assert header[10:header.index(b'\x00', 10)] == name[:-len('.gz')].encode()
@@ -0,0 +1,72 @@
+"""
+El progreso agrupado no debe llamar al callback más veces de las permitidas
+y siempre debe terminar informando del 100 %.
+"""
+
+import time
+
+import pytest
+
+from core.file_extractor import FileExtractor
+from core.progress import ProgressReporter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize('max_rate', [5, 20])
+def test_callbacks_are_rate_limited(max_rate):
+    clock = FakeClock()
+    calls = []
+    files = 1000
+    reporter = ProgressReporter(lambda percent, text: calls.append((clock.now, percent)),
+                                total_bytes=files * 10, total_files=files, max_rate=max_rate, clock=clock)
+    for number in range(files):
+        clock.now += 0.001  # Un archivo por milisegundo: 1 segundo en total
+        reporter.start(f'archivo{number}.py')
+        reporter.advance(10)
+    reporter.finish()
+
+    times = [when for when, _ in calls]
+    # Entre dos llamadas pasa al menos el intervalo mínimo, salvo para el 100 % final
+    assert all(later - earlier >= 1 / max_rate - 1e-9 for earlier, later in zip(times, times[1:-1]))
+    assert len(calls) <= max_rate + 2
+    assert calls[-1][1] == 100
+    assert [percent for _, percent in calls] == sorted(percent for _, percent in calls)
+
+
+def test_finish_flushes_pending_update():
+    clock = FakeClock()
+    calls = []
+    reporter = ProgressReporter(lambda percent, text: calls.append((percent, text)),
+                                total_bytes=100, total_files=2, max_rate=1, clock=clock)
+    reporter.advance(50, label='a.py')
+    reporter.start('b.py')  # Demasiado pronto: queda pendiente
+    assert calls == [(50, "Procesando: a.py")]
+    reporter.finish()
+    assert calls[-1] == (50, "Procesando: b.py")
+    reporter.finish()  # Sin nada pendiente no vuelve a llamar
+    assert len(calls) == 2
+
+
+def test_extraction_progress_is_throttled(tmp_path):
+    root = tmp_path / 'origen'
+    root.mkdir()
+    for number in range(500):
+        (root / f'mod{number:03d}.py').write_text(f"VALOR = {number}\n")
+    calls = []
+    extractor = FileExtractor()
+    extractor.set_progress_callback(lambda percent, text: calls.append((time.monotonic(), percent)))
+    start = time.monotonic()
+    extractor.extract_content(str(root), str(tmp_path / 'salida.txt'))
+    elapsed = time.monotonic() - start
+
+    # Con PROGRESS_MAX_RATE_HZ = 20, muchas menos llamadas que archivos
+    assert len(calls) <= 20 * elapsed + 3
+    assert len(calls) < 500
+    assert calls[-1][1] == 100
@@ -0,0 +1,64 @@
+"""
+Las partes de la salida no deben superar el tamaño pedido y, al volver a
+generarlas, no deben quedar partes de una ejecución anterior.
+"""
+
+import json
+import os
+
+import pytest
+
+from core.file_extractor import FileExtractor
+from core.shards import shard_path, shards_manifest_path
+
+SHARD_SIZE = 3000
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / 'origen'
+    for folder in range(4):
+        directory = root / f'carpeta{folder}'
+        directory.mkdir(parents=True)
+        for number in range(10):
+            (directory / f'mod{number}.py').write_text(f"# {folder}.{number}\n" + "x = 1\n" * 60)
+    # Un archivo mayor que una parte ocupa una parte para él solo
+    (root / 'grande.md').write_text("linea de un archivo grande\n" * 200)
+    return str(root)
+
+
+def _shards(output):
+    with open(shards_manifest_path(output), encoding='utf-8') as f:
+        return [os.path.join(os.path.dirname(output), item['path']) for item in json.load(f)['shards']]
+
+
+def test_shards_fit_size(tmp_path, source):
+    output = str(tmp_path / 'salida.txt')
+    extractor = FileExtractor()
+    processed, errors = extractor.extract_content(source, output, shard_size=SHARD_SIZE)
+    assert (processed, errors) == (41, [])
+
+    paths = _shards(output)
+    assert paths == [shard_path(output, number) for number in range(1, len(paths) + 1)]
+    assert len(paths) > 5
+    big = [path for path in paths if os.path.getsize(path) > SHARD_SIZE]
+    assert len(big) == 1
+    with open(big[0], encoding='utf-8') as f:
+        content = f.read()
+    assert content.count("--- Inicio del archivo: ") == 1 and "grande.md" in content
+
+
+def test_fewer_shards_remove_stale_ones(tmp_path, source):
+    output = str(tmp_path / 'salida.txt')
+    extractor = FileExtractor()
+    extractor.extract_content(source, output, shard_size=SHARD_SIZE, index=True)
+    before = _shards(output)
+
+    extractor.extract_content(source, output, shard_size=4 * SHARD_SIZE, index=True)
+    after = _shards(output)
+    assert 1 < len(after) < len(before)
+    names = sorted(os.listdir(tmp_path))
+    expected = sorted(['origen', os.path.basename(shards_manifest_path(output))]
+                      + [name for path in after for name in (os.path.basename(path),
+                                                             os.path.basename(path) + '.idx')])
+    assert names == expected
@@ -0,0 +1,90 @@
+"""
+Mide el arranque en frío: importar el núcleo no debe cargar módulos pesados
+ni que solo se usan con algunas opciones, ni crear carpetas, ni tardar mucho
+más que los módulos de la biblioteca estándar de los que depende.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importar core.cli no debe tardar más que esta proporción de lo que tardan
+# los módulos estándar que usa de todos modos (en local, unas 1,4 veces;
+# con los compresores, json, hashlib y concurrent.futures al arrancar, más de 2)
+MAX_IMPORT_RATIO = 1.8
+
+STDLIB_MODULES = 'argparse, codecs, collections, dataclasses, functools, io, itertools, json, threading, typing'
+
+HEAVY_MODULES = [
+    'chardet',
+    'sqlite3',
+    'concurrent.futures',
+    'tempfile',
+    'asyncio',
+    'hashlib',
+    'mmap',
+    'gzip',
+    'lzma',
+    'bz2',
+    'queue',
+    'PySide6',
+    'customtkinter',
+    'tkinter',
+]
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import %s
+elapsed = time.perf_counter() - start
+loaded = [m for m in %r if m in sys.modules]
+import json
+print(json.dumps({'elapsed': elapsed, 'loaded': loaded}))
+"""
+
+
+def _probe(modules='core.cli', heavy=()):
+    code = _PROBE % (modules, list(heavy))
+    result = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize('module, heavy', [
+    ('core.cli', HEAVY_MODULES),
+    # La interfaz gráfica importa solo el extractor, que no necesita json para arrancar
+    ('core.file_extractor', HEAVY_MODULES + ['json', 'logging', 'pathlib']),
+    # Los procesos de detección importan core.encoding, no el extractor completo
+    ('core.encoding', HEAVY_MODULES + ['json', 'core.file_extractor']),
+])
+def test_import_does_not_load_heavy_modules(module, heavy):
+    assert _probe(module, heavy)['loaded'] == []
+
+
+def test_import_time():
+    # El mejor de varios intentos alternados, para no fallar por ruido puntual
+    samples = [(_probe()['elapsed'], _probe(STDLIB_MODULES)['elapsed']) for _ in range(10)]
+    elapsed = min(sample[0] for sample in samples)
+    stdlib = min(sample[1] for sample in samples)
+    assert elapsed < MAX_IMPORT_RATIO * stdlib, (
+        f"importar core.cli tardó {elapsed:.3f} s; sus dependencias estándar, {stdlib:.3f} s")
+
+
+def test_config_import_creates_no_directories(tmp_path):
+    code = (
+        "import os, sys\n"
+        "sys.path.insert(0, %r)\n"
+        "import config\n"
+        "print(any(os.path.isdir(d) for d in (config.ASSETS_DIR, config.CONFIG_DIR, config.LOGS_DIR)))\n"
+    )
+    # Copia de config.py en una carpeta vacía: las rutas apuntan dentro de ella
+    with open(os.path.join(REPO_DIR, 'config.py'), encoding='utf-8') as f:
+        (tmp_path / 'config.py').write_text(f.read(), encoding='utf-8')
+    result = subprocess.run([sys.executable, '-c', code % str(tmp_path)],
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'